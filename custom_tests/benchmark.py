@@ -0,0 +1,167 @@
+"""Benchmarks of the model operations the suites are built from.
+
+Each operation is timed on the real model over repeated runs: SBML
+parsing, loading the cached snapshot, `model.copy()`, `add_boundary`,
+switching the objective, `optimize()`, `slim_optimize()` and
+`remove_from_model`, each on its own and including the solver update it
+causes. Every
+operation gets min/median/mean/stdev of its wall time and the peak of
+Python memory allocated while it runs (tracemalloc, measured in a separate
+run so it does not inflate the timings).
+
+Results are written as JSON. Given a baseline file from an earlier run,
+operations whose median time grew by more than the tolerance are reported
+and the script exits with status 1:
+
+    python benchmark.py [output json] [baseline json] [repeats] [tolerance]
+"""
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import cobra
+from cobra.io import read_sbml_model
+
+from biolog import BIOMASS_REACTION
+from media import set_medium
+from model_cache import load_model, model_hash
+
+
+MODEL_PATH = "../iMD1629.xml"
+BENCHMARK_MEDIUM = "minimal_glucose"
+DEMAND_METABOLITE = "Protein_c"
+OTHER_OBJECTIVE = "Protein_synthesis"
+REPEATS = 5
+TOLERANCE = 0.25
+
+
+def _operations(path):
+    """[(name, setup, operation, teardown)].
+
+    `setup()` returns the argument of `operation` and `teardown`; neither is
+    timed, so every run of an operation starts from the same state. optlang
+    defers solver changes to the next `solver.update()`, so operations that
+    change the model call it themselves and pay for their own changes.
+    """
+    model = load_model(path)
+    set_medium(model, BENCHMARK_MEDIUM)
+    model.objective = BIOMASS_REACTION
+    model.slim_optimize()
+
+    def nothing(_):
+        pass
+
+    def add_demand(_):
+        model.add_boundary(model.metabolites.get_by_id(DEMAND_METABOLITE), type="demand")
+        model.solver.update()
+
+    def remove_demand(_):
+        model.remove_reactions([f"DM_{DEMAND_METABOLITE}"])
+        model.solver.update()
+
+    def with_demand():
+        add_demand(None)
+        return model.reactions.get_by_id(f"DM_{DEMAND_METABOLITE}")
+
+    def remove_from_model(demand):
+        demand.remove_from_model()
+        model.solver.update()
+
+    def set_objective(objective):
+        model.objective = objective
+        model.solver.update()
+
+    return [
+        ("read_sbml_model", lambda: path, read_sbml_model, nothing),
+        ("load_model_cached", lambda: path, load_model, nothing),
+        ("model_copy", lambda: model, lambda m: m.copy(), nothing),
+        ("add_boundary", lambda: None, add_demand, remove_demand),
+        ("switch_objective", lambda: OTHER_OBJECTIVE, set_objective, lambda _: set_objective(BIOMASS_REACTION)),
+        ("optimize", lambda: model, lambda m: m.optimize(), nothing),
+        ("slim_optimize", lambda: model, lambda m: m.slim_optimize(), nothing),
+        ("remove_from_model", with_demand, remove_from_model, nothing),
+    ]
+
+
+def _time(setup, operation, teardown, repeats):
+    times = []
+    for _ in range(repeats):
+        argument = setup()
+        start = time.perf_counter()
+        operation(argument)
+        times.append(time.perf_counter() - start)
+        teardown(argument)
+    return times
+
+
+def _peak_memory(setup, operation, teardown):
+    argument = setup()
+    tracemalloc.start()
+    try:
+        operation(argument)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        teardown(argument)
+
+
+def run_benchmarks(path=MODEL_PATH, repeats=REPEATS):
+    "Time every operation `repeats` times; returns the result dictionary written to JSON."
+    results = {}
+    for name, setup, operation, teardown in _operations(path):
+        times = _time(setup, operation, teardown, repeats)
+        results[name] = {
+            "times": times,
+            "min": min(times),
+            "median": statistics.median(times),
+            "mean": statistics.mean(times),
+            "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+            "peak_memory_bytes": _peak_memory(setup, operation, teardown),
+        }
+    return {
+        "model_hash": model_hash(path),
+        "cobra_version": cobra.__version__,
+        "python_version": platform.python_version(),
+        "machine": platform.machine(),
+        "host": platform.node(),
+        "repeats": repeats,
+        "operations": results,
+    }
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    "[(operation, baseline median, current median)] for operations slower than the baseline by more than `tolerance`."
+    regressions = []
+    for name, current in results["operations"].items():
+        previous = baseline["operations"].get(name)
+        if previous is not None and current["median"] > previous["median"] * (1 + tolerance):
+            regressions.append((name, previous["median"], current["median"]))
+    return regressions
+
+
+if __name__ == "__main__":
+    output = sys.argv[1] if len(sys.argv) > 1 else "benchmark.json"
+    baseline_path = sys.argv[2] if len(sys.argv) > 2 else ""
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else REPEATS
+    tolerance = float(sys.argv[4]) if len(sys.argv) > 4 else TOLERANCE
+
+    results = run_benchmarks(repeats=repeats)
+    with open(output, "w") as handle:
+        json.dump(results, handle, indent=1)
+    for name, stats in results["operations"].items():
+        print(f"{name:20s} median {stats['median'] * 1000:10.2f} ms  "
+              f"stdev {stats['stdev'] * 1000:8.2f} ms  peak {stats['peak_memory_bytes'] / 2**20:8.1f} MiB")
+
+    if baseline_path:
+        with open(baseline_path) as handle:
+            baseline = json.load(handle)
+        if baseline["model_hash"] != results["model_hash"]:
+            print("Note: the baseline was measured on a different model version")
+        regressions = compare(results, baseline, tolerance)
+        for name, previous, current in regressions:
+            print(f"Regression: {name} {previous * 1000:.2f} ms -> {current * 1000:.2f} ms")
+        if regressions:
+            sys.exit(1)
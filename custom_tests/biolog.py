@@ -0,0 +1,430 @@
+"""Batch screening of Biolog carbon sources against one loaded model.
+
+The plate is a table of metabolite id, name and expected growth (1/0), kept
+in biolog_carbon_sources.csv. Every substrate is offered to the model
+through a sink and growth is read from `Biomass_reaction_1`.
+"""
+import functools
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+from cobra import Reaction
+from cobra.util.array import create_stoichiometric_matrix
+from cobra.util.context import get_context
+from optlang.symbolics import Zero
+
+from instrumentation import scenario
+from media import set_medium
+from parallel import default_processes, run_parallel, split_evenly
+from result_store import Result, ScenarioKey
+from scope import NetworkScope
+
+
+BIOMASS_REACTION = "Biomass_reaction_1"
+GROWTH_THRESHOLD = 0.0000001
+# bounds cobra gives a sink created with add_boundary(..., type="sink")
+SINK_BOUNDS = (-1000, 1000)
+# largest bound or mass balance violation of a growth certificate; solvers accept
+# violations up to their feasibility tolerance, which is the size of GROWTH_THRESHOLD
+CERTIFICATE_TOLERANCE = GROWTH_THRESHOLD / 100
+# statuses of rows that come from an actual optimisation; only these go into the result store
+STORED_STATUSES = ("optimal", "infeasible", "unbounded")
+# arrays of `_certificate_arrays`, for the model last screened in feasibility mode
+_certificate_cache = {}
+PLATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "biolog_carbon_sources.csv")
+
+
+def set_biolog_medium(model):
+    "Close every boundary reaction and open the carbon-free Biolog base medium."
+    set_medium(model, "biolog_base")
+
+
+def read_plate(path=PLATE_FILE):
+    "Load a plate definition, keeping metabolite ids as strings."
+    return pd.read_csv(path, dtype={"metabolite_id": str, "name": str, "expected_growth": int})
+
+
+def growth_from_status(status, objective_value):
+    "1 if the model grows, 0 otherwise."
+    if status in ("optimal", "blocked_sink", "feasible") and objective_value > GROWTH_THRESHOLD:
+        return 1
+    return 0
+
+
+def plate_results(plate, rows):
+    """Results table of a plate screen from one (status, objective value, solve time) row per substrate.
+
+    Indexed by metabolite id, with name, expected growth, solver status,
+    objective value, predicted growth (1/0) and solve time in seconds.
+    """
+    results = pd.DataFrame(rows, columns=["status", "objective_value", "solve_time"])
+    results.insert(2, "growth", [growth_from_status(status, objective_value)
+                                 for status, objective_value in zip(results["status"], results["objective_value"])])
+    results.insert(0, "expected_growth", plate["expected_growth"].values)
+    results.insert(0, "name", plate["name"].values)
+    results.index = pd.Index(plate["metabolite_id"].values, name="metabolite_id")
+    return results
+
+
+def slim_solve(model):
+    "Optimize without building a full Solution; returns (status, objective value)."
+    objective_value = model.slim_optimize(error_value=float("nan"))
+    return model.solver.status, objective_value
+
+
+def require_growth(model):
+    """Turn `model` into the growth/no-growth feasibility problem.
+
+    The biomass flux must exceed GROWTH_THRESHOLD and the objective is
+    cleared, so the solver stops at the first feasible point. The solver's
+    feasibility tolerance is tightened to CERTIFICATE_TOLERANCE so that the
+    points it returns pass `_certified`. Use inside a model context.
+    """
+    # the smallest flux that counts as growth
+    model.reactions.get_by_id(BIOMASS_REACTION).lower_bound = np.nextafter(GROWTH_THRESHOLD, np.inf)
+    model.objective = Zero
+    tolerances = model.solver.configuration.tolerances
+    context = get_context(model)
+    if context is not None:
+        context(functools.partial(setattr, tolerances, "feasibility", tolerances.feasibility))
+    tolerances.feasibility = CERTIFICATE_TOLERANCE
+    # the stoichiometry may have changed since the last feasibility screen
+    _certificate_cache.clear()
+
+
+def _certificate_arrays(model):
+    """(stoichiometric matrix, forward and reverse variable positions) of the reactions of `model`.
+
+    Built once and reused while the model keeps the same reactions, such as
+    across the substrates of a plate; `require_growth` starts afresh.
+    """
+    key = (id(model), len(model.variables), len(model.reactions), len(model.metabolites), model.reactions[-1].id)
+    if key not in _certificate_cache:
+        position = {name: i for i, name in enumerate(model.variables.keys())}
+        forward = np.array([position[rxn.id] for rxn in model.reactions])
+        reverse = np.array([position[rxn.reverse_id] for rxn in model.reactions])
+        stoichiometry = create_stoichiometric_matrix(model, array_type="lil").tocsr()
+        _certificate_cache.clear()
+        _certificate_cache[key] = (stoichiometry, forward, reverse)
+    return _certificate_cache[key]
+
+
+def _certified(model, fluxes):
+    """True if `fluxes` (one per reaction, in model order) certify growth.
+
+    The biomass flux must exceed GROWTH_THRESHOLD while every reaction bound
+    and mass balance holds to within CERTIFICATE_TOLERANCE.
+    """
+    stoichiometry, _, _ = _certificate_arrays(model)
+    bounds = np.array([rxn.bounds for rxn in model.reactions], dtype=float)
+    biomass = model.reactions.index(BIOMASS_REACTION)
+    return (fluxes[biomass] > GROWTH_THRESHOLD
+            and (fluxes >= bounds[:, 0] - CERTIFICATE_TOLERANCE).all()
+            and (fluxes <= bounds[:, 1] + CERTIFICATE_TOLERANCE).all()
+            and np.abs(stoichiometry @ fluxes).max(initial=0) <= CERTIFICATE_TOLERANCE)
+
+
+def _fluxes(model):
+    "Fluxes of the last solution, one per reaction in model order."
+    _, forward, reverse = _certificate_arrays(model)
+    primal = np.fromiter(model.solver.primal_values.values(), dtype=float, count=len(model.variables))
+    return primal[forward] - primal[reverse]
+
+
+def classify_growth(model, solve=slim_solve):
+    """Solve a model prepared with `require_growth`; returns (status, biomass flux, fluxes).
+
+    "feasible" comes with the fluxes (array in model reaction order) of the
+    feasible point found as certificate (see `_certified`); "infeasible"
+    (NaN, no fluxes) proves there is no growth. Only a point that fails the check or another solver
+    outcome costs a second LP, maximising the biomass flux with its lower
+    bound at 0 as in a plain screen; that status and objective value are
+    returned, without fluxes.
+    """
+    biomass = model.reactions.get_by_id(BIOMASS_REACTION)
+    status, _ = solve(model)
+    if status == "infeasible":
+        return status, float("nan"), None
+    if status == "optimal":
+        fluxes = _fluxes(model)
+        if _certified(model, fluxes):
+            return "feasible", fluxes[model.reactions.index(BIOMASS_REACTION)], fluxes
+    with model:
+        biomass.lower_bound = 0
+        model.objective = BIOMASS_REACTION
+        status, objective_value = solve(model)
+    return status, objective_value, None
+
+
+def screen_substrate(model, metabolite_id, feasibility=False):
+    """Offer one metabolite through a sink and report (status, objective value, solve time).
+
+    The sink lives inside a model context and is removed on exit. With
+    feasibility=True the model must be prepared with `require_growth` and
+    the result is that of `classify_growth`.
+    """
+    if metabolite_id not in model.metabolites:
+        return "missing_metabolite", float("nan"), 0.0
+    with scenario("biolog", metabolite_id) as record:
+        with model:
+            model.add_boundary(model.metabolites.get_by_id(metabolite_id), type="sink")
+            if feasibility:
+                status, objective_value, _ = classify_growth(model, record.solve)
+            else:
+                status, objective_value = record.solve(model)
+    return status, objective_value, record.lp_time
+
+
+def add_closed_sinks(model, metabolite_ids):
+    """Give every metabolite a sink with bounds (0, 0) and return {metabolite id: sink}.
+
+    All new sinks are added in a single `add_reactions` call. Sinks the
+    model already has are reused and closed. Unknown metabolite ids are
+    skipped. Use inside a model context to have the sinks removed again.
+    """
+    sinks = {}
+    new_sinks = []
+    for metabolite_id in metabolite_ids:
+        if metabolite_id not in model.metabolites or metabolite_id in sinks:
+            continue
+        sink_id = f"SK_{metabolite_id}"
+        if sink_id in model.reactions:
+            sink = model.reactions.get_by_id(sink_id)
+            sink.bounds = (0, 0)
+        else:
+            metabolite = model.metabolites.get_by_id(metabolite_id)
+            sink = Reaction(sink_id, name=f"{metabolite.name} sink", lower_bound=0, upper_bound=0)
+            sink.add_metabolites({metabolite: -1})
+            new_sinks.append(sink)
+        sinks[metabolite_id] = sink
+    model.add_reactions(new_sinks)
+    return sinks
+
+
+def screen_open_sink(model, sink, feasibility=False):
+    """Open one pre-created sink, solve, and close it again.
+
+    Only bounds change between consecutive substrates, so the solver keeps
+    its problem and warm-starts from the previous basis. `feasibility` as
+    in `screen_substrate`.
+    """
+    with scenario("biolog", next(iter(sink.metabolites)).id) as record:
+        sink.bounds = SINK_BOUNDS
+        if feasibility:
+            status, objective_value, _ = classify_growth(model, record.solve)
+        else:
+            status, objective_value = record.solve(model)
+        sink.bounds = (0, 0)
+    return status, objective_value, record.lp_time
+
+
+def screen_carbon_sources(model, plate, mode="toggle", prefilter=False, blocked_substrates=(), feasibility=False):
+    """Run the whole plate against `model` and return one row per substrate.
+
+    With mode="toggle" (default) one closed sink per substrate is created up
+    front and the sinks are opened one at a time; mode="add_remove" adds
+    and removes a fresh sink for every substrate instead. With
+    prefilter=True, substrates whose network scope cannot reach every
+    biomass precursor are reported with status "out_of_scope" and no growth
+    without solving an LP (see scope.py); if the medium alone reaches them
+    all, a warning is issued and nothing is filtered. Substrates listed in
+    `blocked_substrates` (sinks that cannot carry flux, from
+    network_index.py) get the growth of the medium alone, status
+    "blocked_sink", again without their own LP. With feasibility=True each
+    substrate is only checked for a feasible point with growth (see
+    `require_growth`); the status is then "feasible" or "infeasible" (or
+    that of the fallback optimisation in `classify_growth`) and the
+    objective value column holds the biomass flux of the feasible point
+    rather than the optimum. The returned DataFrame is indexed
+    by metabolite id and holds name, expected growth, solver status,
+    objective value, predicted growth (1/0) and solve time in seconds.
+    """
+    if mode not in ("toggle", "add_remove"):
+        raise ValueError(f"Unknown screening mode: {mode}")
+
+    rows = []
+    with model:
+        model.objective = BIOMASS_REACTION
+        out_of_scope = set()
+        if prefilter:
+            network_scope = NetworkScope(model)
+        if prefilter and network_scope.reaches_target([]):
+            warnings.warn("The medium alone reaches every biomass precursor in the network scope; "
+                          "the prefilter cannot rule out any substrate and is skipped")
+        elif prefilter:
+            out_of_scope = {
+                metabolite_id for metabolite_id in plate["metabolite_id"]
+                if metabolite_id in model.metabolites and not network_scope.reaches_target([metabolite_id])
+            }
+        if feasibility:
+            require_growth(model)
+        blocked = set(blocked_substrates) - out_of_scope
+        if blocked:
+            # a blocked sink leaves the medium alone; one LP covers all of them
+            _, base_value = classify_growth(model)[:2] if feasibility else slim_solve(model)
+        skipped = out_of_scope | blocked
+        if mode == "toggle":
+            sinks = add_closed_sinks(model, [m for m in plate["metabolite_id"] if m not in skipped])
+        for metabolite_id in plate["metabolite_id"]:
+            if metabolite_id in out_of_scope:
+                status, objective_value, solve_time = "out_of_scope", float("nan"), 0.0
+            elif metabolite_id in blocked:
+                status, objective_value, solve_time = "blocked_sink", base_value, 0.0
+            elif mode == "add_remove":
+                status, objective_value, solve_time = screen_substrate(model, metabolite_id, feasibility)
+            elif metabolite_id in sinks:
+                status, objective_value, solve_time = screen_open_sink(model, sinks[metabolite_id], feasibility)
+            else:
+                status, objective_value, solve_time = "missing_metabolite", float("nan"), 0.0
+            rows.append((status, objective_value, solve_time))
+    return plate_results(plate, rows)
+
+
+def _screen_plate_chunk(model, plate, prefilter=False, blocked_substrates=(), feasibility=False):
+    return screen_carbon_sources(model, plate, prefilter=prefilter, blocked_substrates=blocked_substrates,
+                                 feasibility=feasibility)
+
+
+def screen_carbon_sources_parallel(path_to_model, plate, processes=None, prepare=set_biolog_medium, prefilter=False,
+                                   blocked_substrates=(), feasibility=False):
+    """Run the plate across a pool of worker processes.
+
+    Each worker loads the model from `path_to_model` once and applies
+    `prepare` (the Biolog base medium by default). The plate is split into
+    contiguous chunks, each screened in toggle mode so consecutive LPs in a
+    worker stay warm-started. The result has the same layout and row order
+    as `screen_carbon_sources`.
+    """
+    if processes is None:
+        processes = default_processes()
+    # a few chunks per worker keeps the pool busy when solve times differ
+    chunks = split_evenly(plate.reset_index(drop=True), processes * 4)
+    task = functools.partial(_screen_plate_chunk, prefilter=prefilter, blocked_substrates=list(blocked_substrates),
+                             feasibility=feasibility)
+    results = run_parallel(path_to_model, task, chunks, processes=processes, prepare=prepare)
+    return pd.concat(results)
+
+
+def _pair_values(model, metabolite_ids, rows):
+    """Objective values of substrate pairs (i, j >= i) for the given rows i.
+
+    One closed sink per substrate is created; sink i stays open while the
+    sinks j are toggled, so each LP starts from the basis of the previous
+    one. The diagonal (i, i) is the single-substrate run.
+    """
+    values = []
+    with model:
+        model.objective = BIOMASS_REACTION
+        sinks = add_closed_sinks(model, metabolite_ids)
+        for i in rows:
+            if metabolite_ids[i] not in sinks:
+                continue
+            first = sinks[metabolite_ids[i]]
+            first.bounds = SINK_BOUNDS
+            for j in range(i, len(metabolite_ids)):
+                if metabolite_ids[j] not in sinks:
+                    continue
+                second = sinks[metabolite_ids[j]]
+                second.bounds = SINK_BOUNDS
+                status, objective_value = slim_solve(model)
+                values.append((i, j, objective_value if status == "optimal" else float("nan")))
+                if j != i:
+                    second.bounds = (0, 0)
+            first.bounds = (0, 0)
+    return values
+
+
+def _pair_matrix(metabolite_ids, values):
+    matrix = np.full((len(metabolite_ids), len(metabolite_ids)), np.nan)
+    for i, j, objective_value in values:
+        matrix[i, j] = matrix[j, i] = objective_value
+    index = pd.Index(metabolite_ids, name="metabolite_id")
+    return pd.DataFrame(matrix, index=index, columns=index.rename("second_metabolite_id"))
+
+
+def screen_substrate_pairs(model, plate):
+    """Growth on every pair of plate substrates offered together.
+
+    Returns a symmetric substrate x substrate DataFrame of
+    `Biomass_reaction_1` values (NaN where the LP is not optimal); the
+    diagonal holds the single-substrate values. Cells above
+    GROWTH_THRESHOLD are growth.
+    """
+    metabolite_ids = list(plate["metabolite_id"])
+    return _pair_matrix(metabolite_ids, _pair_values(model, metabolite_ids, range(len(metabolite_ids))))
+
+
+def _screen_pair_rows(model, task):
+    metabolite_ids, rows = task
+    return _pair_values(model, metabolite_ids, rows)
+
+
+def screen_substrate_pairs_parallel(path_to_model, plate, processes=None, prepare=set_biolog_medium):
+    """`screen_substrate_pairs` across the process pool.
+
+    Row i holds the pairs (i, j >= i), so early rows are the longest; rows
+    are dealt out round-robin to balance the chunks.
+    """
+    metabolite_ids = list(plate["metabolite_id"])
+    if processes is None:
+        processes = default_processes()
+    n_chunks = max(1, min(processes * 4, len(metabolite_ids)))
+    tasks = [(metabolite_ids, list(range(k, len(metabolite_ids), n_chunks))) for k in range(n_chunks)]
+    results = run_parallel(path_to_model, _screen_pair_rows, tasks, processes=processes, prepare=prepare)
+    return _pair_matrix(metabolite_ids, [value for chunk in results for value in chunk])
+
+
+def classify_pairs(pair_values):
+    """Label each substrate pair "rescue", "enhance" or "none".
+
+    rescue: the pair grows though neither substrate does on its own;
+    enhance: the pair grows more than the better substrate alone.
+    """
+    values = pair_values.fillna(0.0).values
+    single = np.diag(values)
+    best_single = np.maximum.outer(single, single)
+    labels = np.full(values.shape, "none", dtype=object)
+    labels[(values > GROWTH_THRESHOLD) & (best_single <= GROWTH_THRESHOLD)] = "rescue"
+    labels[(best_single > GROWTH_THRESHOLD) & (values > best_single * (1 + 1e-6) + GROWTH_THRESHOLD)] = "enhance"
+    np.fill_diagonal(labels, "none")
+    return pd.DataFrame(labels, index=pair_values.index, columns=pair_values.columns)
+
+
+def screen_carbon_sources_stored(store, model_hash, medium_hash, plate, screen, solver, feasibility=False):
+    """Serve substrates from a result_store.ResultStore and screen only the others.
+
+    Substrates are stored as scenario "biolog:<metabolite id>" of this model
+    hash, medium hash and `solver` (the label of the solver `screen` uses).
+    `screen(plate)` runs the substrates without a stored result (e.g. a
+    partial of `screen_carbon_sources`). Only its rows that come from an
+    optimisation (STORED_STATUSES) are added to the store; prefilter and
+    blocked-sink rows are not, and with feasibility=True (a `screen` in
+    feasibility mode) nothing is. Stored rows have a solve time of 0. The
+    result has the layout and row order of `screen_carbon_sources`.
+    """
+    stored = {}
+    for metabolite_id in plate["metabolite_id"]:
+        result = store.get(ScenarioKey(model_hash, medium_hash, BIOMASS_REACTION, f"biolog:{metabolite_id}", solver))
+        if result is not None:
+            stored[metabolite_id] = result
+
+    missing = plate[~plate["metabolite_id"].isin(stored)]
+    screened = screen(missing.reset_index(drop=True)) if len(missing) else None
+    if screened is not None and not feasibility:
+        store.put_many(
+            (ScenarioKey(model_hash, medium_hash, BIOMASS_REACTION, f"biolog:{metabolite_id}", solver),
+             Result(row.status, row.objective_value, {}))
+            for metabolite_id, row in zip(screened.index, screened.itertuples(index=False))
+            if row.status in STORED_STATUSES
+        )
+
+    rows = []
+    for metabolite_id in plate["metabolite_id"]:
+        if metabolite_id in stored:
+            status, objective_value, _ = stored[metabolite_id]
+            rows.append((status, objective_value, 0.0))
+        else:
+            rows.append(tuple(screened.loc[metabolite_id, ["status", "objective_value", "solve_time"]]))
+    return plate_results(plate, rows)
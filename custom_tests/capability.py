@@ -0,0 +1,189 @@
+"""Biosynthetic capability atlas: can the model make each metabolite, and how much?
+
+The precursor suite checks seven lumped precursors with one demand
+reaction each. The atlas covers every metabolite of a compartment
+(cytosol by default) with a single preallocated demand reaction: its
+column in the solver problem is rewired from one metabolite constraint to
+the next, so no reaction is added or removed per metabolite and each LP
+starts from the previous basis.
+
+The maximal yield is the maximal demand flux per unit uptake of the
+carbon source of the medium (`carbon_source` in media.json, glucose on
+minimal_glucose), or the plain maximal flux on a medium without one.
+Results are cached per model version and medium; metabolites already in
+the cache are not solved again. For a new model version, the atlas of the
+previous version is carried over when the edit cannot change it (as in
+model_diff.py):
+
+    python capability.py [output csv] [processes] [previous sbml]
+"""
+import functools
+import os
+import sys
+
+import pandas as pd
+from cobra import Reaction
+
+from biolog import GROWTH_THRESHOLD
+from media import medium_carbon_source, medium_hash, set_medium
+from model_cache import CACHE_DIR, load_model, model_hash
+from model_diff import blocked_in_relaxation, diff_hashes, entity_hashes, lp_changed_reactions
+from parallel import default_processes, run_parallel, split_evenly
+from scope import NetworkScope
+
+
+ATLAS_MEDIUM = "minimal_glucose"
+DEMAND_SLOT = "capability_demand"
+
+
+def producible_metabolites(model, metabolite_ids, uptake_reaction=None):
+    """Rows (metabolite id, status, maximal yield) on the current medium of `model`.
+
+    Yields are per unit uptake of `uptake_reaction`, which the medium must
+    leave open for uptake; without one they are plain maximal fluxes.
+    """
+    rows = []
+    with model:
+        demand = Reaction(DEMAND_SLOT, lower_bound=0, upper_bound=1000)
+        model.add_reactions([demand])
+        model.objective = demand
+        if uptake_reaction is not None:
+            uptake = model.reactions.get_by_id(uptake_reaction)
+            if uptake.lower_bound >= 0:
+                raise ValueError(f"{uptake_reaction} allows no uptake on this medium")
+            uptake.bounds = (max(uptake.lower_bound, -1), uptake.upper_bound)
+        forward, reverse = demand.forward_variable, demand.reverse_variable
+        for met_id in metabolite_ids:
+            constraint = model.constraints[met_id]
+            constraint.set_linear_coefficients({forward: -1, reverse: 1})
+            value = model.slim_optimize(error_value=float("nan"))
+            rows.append((met_id, model.solver.status, value))
+            constraint.set_linear_coefficients({forward: 0, reverse: 0})
+    return rows
+
+
+def _atlas_frame(rows):
+    results = pd.DataFrame(rows, columns=["metabolite_id", "status", "maximal_yield"]).set_index("metabolite_id")
+    results["producible"] = results["maximal_yield"].fillna(0.0) > GROWTH_THRESHOLD
+    return results
+
+
+def _atlas_chunk(model, metabolite_ids, uptake_reaction):
+    return producible_metabolites(model, metabolite_ids, uptake_reaction)
+
+
+def atlas_path(path_to_model, medium, uptake_reaction, cache_dir=CACHE_DIR):
+    "Cache file of the atlas for this model version, medium and uptake normalisation."
+    return os.path.join(
+        cache_dir, f"atlas-{model_hash(path_to_model)}-{medium_hash(medium)}-{uptake_reaction or 'flux'}.csv"
+    )
+
+
+def _read_atlas(path):
+    try:
+        return pd.read_csv(path, index_col="metabolite_id", dtype={"metabolite_id": str})
+    except FileNotFoundError:
+        return None
+
+
+def _write_atlas(atlas, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    atlas.to_csv(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def atlas_affected(old_model, new_model, diff, medium, metabolite_ids):
+    """True if the model edit `diff` may change any atlas row of `metabolite_ids` on `medium`.
+
+    As in model_diff.affected_scenarios, a changed reaction cannot matter
+    if it is blocked in both versions with every boundary reaction and a
+    sink for every atlas metabolite open, or if it is outside the network
+    scope of the medium in both versions. A demand adds no seed to the
+    scope, so all atlas rows share it and any other change affects them
+    all.
+    """
+    changed = lp_changed_reactions(diff)
+    if not changed:
+        return False
+    blocked_old = blocked_in_relaxation(old_model, changed, metabolite_ids)
+    blocked_new = blocked_in_relaxation(new_model, changed, metabolite_ids)
+    relevant = {
+        rxn_id for rxn_id in changed
+        if not ((rxn_id not in old_model.reactions or rxn_id in blocked_old)
+                and (rxn_id not in new_model.reactions or rxn_id in blocked_new))
+    }
+    if not relevant:
+        return False
+    in_scope = set()
+    for model in (old_model, new_model):
+        with model:
+            set_medium(model, medium)
+            in_scope |= NetworkScope(model).reactions_in_scope([])
+    return bool(relevant & in_scope)
+
+
+def carry_forward_atlas(old_path, new_path, medium=ATLAS_MEDIUM, compartment="c", cache_dir=CACHE_DIR):
+    """Copy the cached atlas of `old_path` to the version `new_path` if the edit cannot change it.
+
+    Only rows of metabolites still in `compartment` of the new version are
+    copied, and only into an atlas the new version does not have yet.
+    Returns the number of rows copied.
+    """
+    uptake_reaction = medium_carbon_source(medium)
+    old_atlas = _read_atlas(atlas_path(old_path, medium, uptake_reaction, cache_dir))
+    new_atlas_path = atlas_path(new_path, medium, uptake_reaction, cache_dir)
+    if old_atlas is None or os.path.exists(new_atlas_path):
+        return 0
+    old_model, new_model = load_model(old_path), load_model(new_path)
+    wanted = [met.id for met in new_model.metabolites if met.compartment == compartment]
+    diff = diff_hashes(entity_hashes(old_model), entity_hashes(new_model))
+    if atlas_affected(old_model, new_model, diff, medium, sorted(set(old_atlas.index) | set(wanted))):
+        return 0
+    kept = old_atlas[old_atlas.index.isin(wanted)]
+    _write_atlas(kept, new_atlas_path)
+    return len(kept)
+
+
+def capability_atlas(path_to_model, medium=ATLAS_MEDIUM, compartment="c", processes=None, cache_dir=CACHE_DIR,
+                     previous_model=None):
+    """Producibility and maximal yield of every metabolite in `compartment`.
+
+    Yields are normalised by the carbon source of `medium`, if it has one.
+    With `previous_model` (the SBML file of an earlier version), its cached
+    atlas is carried over first (see `carry_forward_atlas`). Metabolites
+    missing from the cached atlas of this model version and medium are
+    computed across the process pool and added to the cache. Returns a
+    DataFrame indexed by metabolite id with solver status, maximal yield
+    and a producible flag.
+    """
+    if previous_model is not None:
+        carry_forward_atlas(previous_model, path_to_model, medium, compartment, cache_dir)
+    model = load_model(path_to_model)
+    wanted = [met.id for met in model.metabolites if met.compartment == compartment]
+
+    uptake_reaction = medium_carbon_source(medium)
+    path = atlas_path(path_to_model, medium, uptake_reaction, cache_dir)
+    cached = _read_atlas(path)
+
+    missing = wanted if cached is None else [met_id for met_id in wanted if met_id not in cached.index]
+    if missing:
+        if processes is None:
+            processes = default_processes()
+        task = functools.partial(_atlas_chunk, uptake_reaction=uptake_reaction)
+        prepare = functools.partial(set_medium, name=medium)
+        chunks = split_evenly(missing, processes * 4)
+        computed = _atlas_frame([row for rows in run_parallel(path_to_model, task, chunks, processes=processes,
+                                                              prepare=prepare) for row in rows])
+        cached = computed if cached is None else pd.concat([cached, computed])
+        _write_atlas(cached, path)
+    return cached.loc[wanted]
+
+
+if __name__ == "__main__":
+    output = sys.argv[1] if len(sys.argv) > 1 else f"capability_atlas_{ATLAS_MEDIUM}.csv"
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 and sys.argv[2] else None
+    previous_model = sys.argv[3] if len(sys.argv) > 3 else None
+    atlas = capability_atlas("../iMD1629.xml", processes=processes, previous_model=previous_model)
+    atlas.to_csv(output)
+    print(f"{atlas['producible'].sum()} of {len(atlas)} metabolites producible")
@@ -0,0 +1,257 @@
+"""Gene deletion screens on a loaded model.
+
+A deletion is simulated by closing every reaction whose GPR rule evaluates
+to False without the deleted genes, worked out in batch by gpr.CompiledGPR.
+The bound changes are made inside a model context, so one solver problem is
+reused for all deletions and each LP is warm-started from the previous one. Growth is read from
+`Biomass_reaction_1` and reported relative to the wild type.
+"""
+import functools
+import itertools
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from biolog import BIOMASS_REACTION, GROWTH_THRESHOLD, classify_growth, require_growth, slim_solve
+from gpr import CompiledGPR
+from media import set_medium
+from model_cache import load_model
+from parallel import default_processes, run_parallel, split_evenly
+from solvers import configure_solver
+
+
+ESSENTIALITY_MEDIUM = "minimal_glucose"
+
+
+def simulate_deletion(model, reactions):
+    "Close `reactions` temporarily and return (status, growth, solve time)."
+    with model:
+        for rxn in reactions:
+            rxn.bounds = (0, 0)
+        start = time.perf_counter()
+        status, growth = slim_solve(model)
+        solve_time = time.perf_counter() - start
+    return status, growth, solve_time
+
+
+def deletion_label(gene_ids):
+    "Row label of a deletion set: gene ids joined with ';'."
+    return ";".join(gene_ids)
+
+
+def deletion_screen(model, deletion_sets, gpr=None):
+    """Simulate each gene deletion set in turn and return one row per set.
+
+    The reactions disabled by every set are worked out in one batched pass
+    over the compiled GPR rules (`gpr`, compiled from `model` if not
+    given). Columns: number of reactions knocked out, solver status,
+    growth, growth ratio to the wild type, essential (no growth) and solve
+    time in seconds. Rows are labelled with `deletion_label`. The wild-type
+    growth and total wall time are stored in `results.attrs`.
+    """
+    start = time.perf_counter()
+    deletion_sets = [tuple(gene_ids) for gene_ids in deletion_sets]
+    if gpr is None:
+        gpr = CompiledGPR(model)
+    disabled = gpr.disabled(deletion_sets)
+    rows = []
+    with model:
+        model.objective = BIOMASS_REACTION
+        _, wild_type = slim_solve(model)
+        for knocked_out in disabled:
+            reactions = [model.reactions[j] for j in np.flatnonzero(knocked_out)]
+            if reactions:
+                status, growth, solve_time = simulate_deletion(model, reactions)
+            else:
+                status, growth, solve_time = "optimal", wild_type, 0.0
+            rows.append((len(reactions), status, growth, solve_time))
+
+    results = pd.DataFrame(rows, columns=["n_reactions", "status", "growth", "solve_time"],
+                           index=pd.Index([deletion_label(gene_ids) for gene_ids in deletion_sets], name="deletion"))
+    results.insert(3, "growth_ratio", results["growth"].fillna(0.0) / wild_type)
+    results.insert(4, "essential", ~(results["growth"].fillna(0.0) > GROWTH_THRESHOLD))
+    results.attrs["wild_type"] = wild_type
+    results.attrs["wall_time"] = time.perf_counter() - start
+    return results
+
+
+def single_gene_deletion_screen(model, gene_ids=None, gpr=None):
+    "`deletion_screen` over single genes (all genes by default), indexed by gene id."
+    if gene_ids is None:
+        gene_ids = [gene.id for gene in model.genes]
+    results = deletion_screen(model, [(gene_id,) for gene_id in gene_ids], gpr)
+    results.index.name = "gene_id"
+    return results
+
+
+def double_gene_deletion_screen(model, gene_ids, gpr=None):
+    "`deletion_screen` over every unordered pair of `gene_ids`."
+    return deletion_screen(model, itertools.combinations(gene_ids, 2), gpr)
+
+
+def _screen_gene_chunk(model, gene_ids):
+    return single_gene_deletion_screen(model, gene_ids)
+
+
+def gene_essentiality_screen(path_to_model, medium=ESSENTIALITY_MEDIUM, gene_ids=None, processes=None):
+    """Single-gene deletion screen of the whole model across a process pool.
+
+    Each worker loads the model once, applies `medium` and screens a
+    contiguous chunk of genes on its own solver problem. Rows come back in
+    model gene order, with the total wall time in `results.attrs["wall_time"]`.
+    """
+    start = time.perf_counter()
+    if gene_ids is None:
+        gene_ids = [gene.id for gene in load_model(path_to_model).genes]
+    if processes is None:
+        processes = default_processes()
+    chunks = split_evenly(list(gene_ids), processes * 4)
+    prepare = functools.partial(set_medium, name=medium)
+    results = pd.concat(run_parallel(path_to_model, _screen_gene_chunk, chunks, processes=processes, prepare=prepare))
+    results.attrs["wall_time"] = time.perf_counter() - start
+    return results
+
+
+def _growth_without_reactions(model, reaction_id_sets, feasibility=False):
+    """Growth with each set of reactions closed in turn; used by the pool.
+
+    With feasibility=True only growth/no growth is decided (biolog.require_growth)
+    and the growth of a viable set is the biomass flux of the feasible point.
+    """
+    rows = []
+    with model:
+        model.objective = BIOMASS_REACTION
+        if feasibility:
+            require_growth(model)
+        for reaction_ids in reaction_id_sets:
+            with model:
+                for reaction_id in reaction_ids:
+                    model.reactions.get_by_id(reaction_id).bounds = (0, 0)
+                status, growth = classify_growth(model)[:2] if feasibility else slim_solve(model)
+            rows.append(growth if status in ("optimal", "feasible") else 0.0)
+    return rows
+
+
+def interchangeable_genes(gpr, gene_ids):
+    """Group genes that occur in exactly the same GPR clauses.
+
+    Genes of one group are interchangeable in every rule, so a pair (a, x)
+    behaves like (b, x) for any a, b of the group. Genes of rules left to
+    cobra's evaluator (`gpr.fallback`) have no clauses and stay in groups of
+    their own.
+    """
+    columns = gpr.clause_genes.tocsc()
+    fallback_genes = {gene_id for rule in gpr.fallback.values() for gene_id in rule.genes}
+    groups = {}
+    for gene_id in gene_ids:
+        j = gpr.gene_index[gene_id]
+        signature = tuple(columns.indices[columns.indptr[j]:columns.indptr[j + 1]])
+        if gene_id in fallback_genes:
+            signature = ("fallback", gene_id)
+        groups.setdefault(signature, []).append(gene_id)
+    return list(groups.values())
+
+
+def synthetic_lethal_screen(path_to_model, medium=ESSENTIALITY_MEDIUM, gene_ids=None, processes=None,
+                            batch_size=20000, flux_tolerance=1e-9, feasibility=False):
+    """Double deletion screen reporting synthetic lethal gene pairs.
+
+    Instead of one LP per pair, the screen
+    1. drops genes that are lethal on their own,
+    2. keeps one representative per group of interchangeable genes,
+    3. skips pairs whose disabled reactions carry no flux in the wild-type
+       solution (the wild-type optimum stays feasible, so they are viable),
+    4. solves each distinct disabled reaction set only once, reusing the
+       single-deletion results,
+    and sends the remaining LPs to the process pool; with feasibility=True
+    these only look for a feasible point with growth (biolog.require_growth).
+    Returns a DataFrame of synthetic lethal pairs (gene_a, gene_b, growth);
+    `attrs` holds the pair and LP counts, LP wall time and throughput in
+    LPs/second.
+    """
+    start = time.perf_counter()
+    model = load_model(path_to_model)
+    configure_solver(model, path_to_model)
+    set_medium(model, medium)
+    model.objective = BIOMASS_REACTION
+    gpr = CompiledGPR(model)
+    if gene_ids is None:
+        gene_ids = gpr.gene_ids
+
+    singles = single_gene_deletion_screen(model, gene_ids, gpr)
+    viable = [gene_id for gene_id in gene_ids if not singles.loc[gene_id, "essential"]]
+    wild_type_fluxes = model.optimize().fluxes.values
+    carries_flux = np.abs(wild_type_fluxes) > flux_tolerance
+
+    groups = interchangeable_genes(gpr, viable)
+    members = {group[0]: group for group in groups}
+    candidates = list(itertools.combinations(members, 2))
+    # all pairs inside one group are equivalent; one stands for the rest
+    candidates += [(group[0], group[1]) for group in groups if len(group) > 1]
+
+    growth_of = {frozenset(): singles.attrs["wild_type"]}
+    for gene_id, row in zip(gene_ids, gpr.disabled([(gene_id,) for gene_id in gene_ids])):
+        growth_of[frozenset(np.flatnonzero(row))] = singles.loc[gene_id, "growth"]
+    pair_keys = []
+    to_solve = {}
+    for batch_start in range(0, len(candidates), batch_size):
+        batch = candidates[batch_start:batch_start + batch_size]
+        for row in gpr.disabled(batch):
+            key = frozenset(np.flatnonzero(row))
+            if not carries_flux[list(key)].any():
+                key = frozenset()
+            elif key not in growth_of:
+                to_solve[key] = None
+            pair_keys.append(key)
+
+    lp_start = time.perf_counter()
+    keys = list(to_solve)
+    if keys:
+        if processes is None:
+            processes = default_processes()
+        reaction_sets = [[gpr.reaction_ids[j] for j in sorted(key)] for key in keys]
+        prepare = functools.partial(set_medium, name=medium)
+        chunks = split_evenly(reaction_sets, processes * 4)
+        growths = itertools.chain.from_iterable(
+            run_parallel(path_to_model, functools.partial(_growth_without_reactions, feasibility=feasibility), chunks,
+                         processes=processes, prepare=prepare)
+        )
+        growth_of.update(zip(keys, growths))
+    lp_time = time.perf_counter() - lp_start
+
+    lethal = []
+    for (gene_a, gene_b), key in zip(candidates, pair_keys):
+        growth = growth_of[key]
+        if growth > GROWTH_THRESHOLD:
+            continue
+        if gene_b in members.get(gene_a, ()):
+            group = members[gene_a]
+            lethal.extend((a, b, growth) for a, b in itertools.combinations(group, 2))
+        else:
+            lethal.extend((a, b, growth) for a in members[gene_a] for b in members[gene_b])
+
+    results = pd.DataFrame(lethal, columns=["gene_a", "gene_b", "growth"])
+    n_viable = len(viable)
+    results.attrs.update({
+        "n_genes": len(gene_ids),
+        "n_single_lethal": len(gene_ids) - n_viable,
+        "n_pairs": n_viable * (n_viable - 1) // 2,
+        "n_candidate_pairs": len(candidates),
+        "n_lp": len(keys),
+        "lp_time": lp_time,
+        "lps_per_second": len(keys) / lp_time if lp_time > 0 else float("nan"),
+        "wall_time": time.perf_counter() - start,
+    })
+    return results
+
+
+if __name__ == "__main__":
+    # python deletion.py [output csv] [processes]
+    output = sys.argv[1] if len(sys.argv) > 1 else f"gene_essentiality_{ESSENTIALITY_MEDIUM}.csv"
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    results = gene_essentiality_screen("../iMD1629.xml", processes=processes)
+    results.to_csv(output)
+    print(f"{results['essential'].sum()} essential genes out of {len(results)}; "
+          f"{results.attrs['wall_time']:.1f} s wall time, {results['solve_time'].sum():.1f} s solving")
@@ -0,0 +1,13 @@
+"""Environment flags of the test suites that cannot be combined.
+
+Each alternative solve path (IMD_NATIVE_LP, BIOLOG_SHARED_MEMORY) honours
+only some of the other settings; a suite refuses the rest instead of
+silently ignoring them.
+"""
+
+
+def refuse_flags(path, flags):
+    "Raise ValueError if any of the (setting, enabled) `flags` is on; `path` cannot honour them."
+    conflicts = [setting for setting, enabled in flags if enabled]
+    if conflicts:
+        raise ValueError(f"{path} cannot be combined with {', '.join(conflicts)}")
@@ -0,0 +1,113 @@
+"""GPR rules compiled into sparse matrices for batched deletion analysis.
+
+Every GPR rule is expanded once into disjunctive normal form: a reaction
+stays active as long as at least one of its AND-clauses has none of its
+genes deleted. With a clause x gene incidence matrix and a clause x
+reaction membership matrix, the reactions disabled by a whole batch of
+gene deletion sets come out of two sparse products instead of one AST
+evaluation per reaction and deletion set.
+
+Rules whose DNF would exceed MAX_CLAUSES clauses are left to cobra's own
+evaluator so that the expansion cannot blow up.
+"""
+import ast
+import itertools
+
+import numpy as np
+from scipy import sparse
+
+
+MAX_CLAUSES = 1024
+
+
+def _dnf(node):
+    "List of AND-clauses (frozensets of gene ids) equivalent to a GPR AST node."
+    if isinstance(node, ast.Name):
+        return [frozenset([node.id])]
+    if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.Or):
+        clauses = [clause for value in node.values for clause in _dnf(value)]
+    elif isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And):
+        parts = [_dnf(value) for value in node.values]
+        size = 1
+        for part in parts:
+            size *= len(part)
+            if size > MAX_CLAUSES:
+                raise OverflowError("GPR rule expands to too many clauses")
+        clauses = [frozenset().union(*combination) for combination in itertools.product(*parts)]
+    else:
+        raise ValueError(f"Unsupported GPR element: {ast.dump(node)}")
+    if len(clauses) > MAX_CLAUSES:
+        raise OverflowError("GPR rule expands to too many clauses")
+    # absorption: (a) or (a and b) == (a)
+    unique = sorted(set(clauses), key=len)
+    return [clause for i, clause in enumerate(unique) if not any(other < clause for other in unique[:i])]
+
+
+class CompiledGPR:
+    """Sparse form of all GPR rules of `model`.
+
+    Reactions without a GPR are never disabled by gene deletions. Compile
+    again after editing genes, reactions or rules.
+    """
+
+    def __init__(self, model):
+        self.reaction_ids = [rxn.id for rxn in model.reactions]
+        self.gene_ids = [gene.id for gene in model.genes]
+        self.gene_index = {gene_id: i for i, gene_id in enumerate(self.gene_ids)}
+        self.fallback = {}
+
+        clause_genes = []
+        clause_reactions = []
+        for j, rxn in enumerate(model.reactions):
+            if rxn.gpr.body is None:
+                continue
+            try:
+                clauses = _dnf(rxn.gpr.body)
+            except OverflowError:
+                self.fallback[j] = rxn.gpr
+                continue
+            for clause in clauses:
+                clause_genes.append([self.gene_index[gene_id] for gene_id in clause])
+                clause_reactions.append(j)
+
+        n_clauses = len(clause_genes)
+        rows = np.repeat(np.arange(n_clauses), [len(genes) for genes in clause_genes])
+        cols = np.fromiter(itertools.chain.from_iterable(clause_genes), dtype=np.int64, count=len(rows))
+        # clause x gene incidence and clause x reaction membership
+        self.clause_genes = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(n_clauses, len(self.gene_ids))
+        )
+        self.clause_reactions = sparse.csr_matrix(
+            (np.ones(n_clauses, dtype=np.int32), (np.arange(n_clauses), clause_reactions)),
+            shape=(n_clauses, len(self.reaction_ids)),
+        )
+        self.has_clauses = np.asarray(self.clause_reactions.sum(axis=0)).ravel() > 0
+
+    def deletion_matrix(self, deletion_sets):
+        "Sparse (deletion set x gene) indicator matrix."
+        rows = []
+        cols = []
+        for i, gene_ids in enumerate(deletion_sets):
+            for gene_id in gene_ids:
+                rows.append(i)
+                cols.append(self.gene_index[gene_id])
+        return sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(len(deletion_sets), len(self.gene_ids))
+        )
+
+    def disabled(self, deletion_sets):
+        "Boolean array (deletion set x reaction) of reactions disabled by each set."
+        deletion_sets = [list(gene_ids) for gene_ids in deletion_sets]
+        deleted = self.deletion_matrix(deletion_sets)
+        # a clause survives when none of its genes is deleted
+        clause_alive = (deleted @ self.clause_genes.T).toarray() == 0
+        alive_clauses = clause_alive.astype(np.int32) @ self.clause_reactions
+        disabled = (np.asarray(alive_clauses) == 0) & self.has_clauses
+        for j, rule in self.fallback.items():
+            for i, gene_ids in enumerate(deletion_sets):
+                disabled[i, j] = not rule.eval(set(gene_ids))
+        return disabled
+
+    def disabled_reactions(self, deletion_sets):
+        "List of disabled reaction ids for each deletion set."
+        return [[self.reaction_ids[j] for j in np.flatnonzero(row)] for row in self.disabled(deletion_sets)]
@@ -0,0 +1,177 @@
+"""Opt-in timing of single screening scenarios (one substrate, one precursor).
+
+A scenario is timed in four parts:
+
+* setup: from entering the scenario to the first solver update
+  (bound changes, adding reactions, switching the objective)
+* update: flushing pending changes to the solver (`model.solver.update()`)
+* solve: the LP itself
+* teardown: from the end of the last solve to leaving the scenario
+  (closing sinks, leaving the model context)
+
+Nothing is written unless IMD_PROFILE is set to a file; each scenario is
+then appended to it as one JSON line with the solver status and simplex
+iterations. With IMD_PROFILE_DIR set as well, every scenario also runs
+under cProfile and its stats are dumped to that directory. Worker
+processes inherit both variables and append to the same file. The native
+GLPK (IMD_NATIVE_LP) and shared-memory (BIOLOG_SHARED_MEMORY) paths solve
+outside any scenario, so the suites refuse IMD_PROFILE with them.
+
+    python instrumentation.py <jsonl file> [profile dir]
+
+prints the aggregated report of a run.
+"""
+import cProfile
+import json
+import os
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+
+PROFILE_ENV = "IMD_PROFILE"
+PROFILE_DIR_ENV = "IMD_PROFILE_DIR"
+
+
+def _iterations(model):
+    "Simplex iterations of the last solve, or None if the interface does not expose them."
+    interface = model.solver.interface.__name__
+    try:
+        if interface == "optlang.glpk_interface":
+            import swiglpk
+            return swiglpk.glp_get_it_cnt(model.solver.problem)
+        if interface == "optlang.gurobi_interface":
+            return int(model.solver.problem.IterCount)
+        if interface == "optlang.cplex_interface":
+            return model.solver.problem.solution.progress.get_num_iterations()
+    except Exception:
+        return None
+    return None
+
+
+class ScenarioRecord:
+    "Timings of one scenario; filled in by `solve`/`optimize` and by leaving `scenario`."
+
+    def __init__(self, suite, name):
+        self.suite = suite
+        self.name = name
+        self.start = time.perf_counter()
+        self.first_update = None
+        self.last_solve_end = None
+        self.update_time = 0.0
+        self.solve_time = 0.0
+        self.status = None
+        self.iterations = None
+
+    def _timed(self, model, optimize):
+        update_start = time.perf_counter()
+        if self.first_update is None:
+            self.first_update = update_start
+        model.solver.update()
+        solve_start = time.perf_counter()
+        result = optimize()
+        self.last_solve_end = time.perf_counter()
+        self.update_time += solve_start - update_start
+        self.solve_time += self.last_solve_end - solve_start
+        self.status = model.solver.status
+        self.iterations = _iterations(model)
+        return result
+
+    def solve(self, model):
+        "`model.slim_optimize`, timed; returns (status, objective value) like biolog.slim_solve."
+        objective_value = self._timed(model, lambda: model.slim_optimize(error_value=float("nan")))
+        return self.status, objective_value
+
+    def optimize(self, model):
+        "`model.optimize`, timed; returns the Solution."
+        return self._timed(model, model.optimize)
+
+    @property
+    def lp_time(self):
+        "Update plus solve time."
+        return self.update_time + self.solve_time
+
+    def as_dict(self, end):
+        first_update = self.first_update if self.first_update is not None else end
+        last_solve_end = self.last_solve_end if self.last_solve_end is not None else end
+        return {
+            "suite": self.suite,
+            "scenario": self.name,
+            "pid": os.getpid(),
+            "setup": first_update - self.start,
+            "update": self.update_time,
+            "solve": self.solve_time,
+            "teardown": end - last_solve_end,
+            "total": end - self.start,
+            "status": self.status,
+            "iterations": self.iterations,
+        }
+
+
+def _profile_file(profile_dir, suite, name):
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+    return os.path.join(profile_dir, f"{suite}-{safe}-{os.getpid()}.prof")
+
+
+@contextmanager
+def scenario(suite, name):
+    """Time one scenario of `suite`; yields its ScenarioRecord.
+
+    The record always carries the timings; it is only written out (and
+    profiled) when IMD_PROFILE is set.
+    """
+    output = os.environ.get(PROFILE_ENV)
+    profile_dir = os.environ.get(PROFILE_DIR_ENV) if output else None
+    profiler = cProfile.Profile() if profile_dir else None
+    record = ScenarioRecord(suite, name)
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield record
+    finally:
+        end = time.perf_counter()
+        if profiler is not None:
+            profiler.disable()
+            os.makedirs(profile_dir, exist_ok=True)
+            profiler.dump_stats(_profile_file(profile_dir, suite, name))
+        if output:
+            # one write per line, so workers appending to the same file do not interleave
+            with open(output, "a") as handle:
+                handle.write(json.dumps(record.as_dict(end)) + "\n")
+
+
+def read_records(path):
+    "DataFrame of the scenarios in a JSON lines file."
+    with open(path) as handle:
+        return pd.DataFrame([json.loads(line) for line in handle if line.strip()])
+
+
+def summarize(records):
+    "Per suite: number of scenarios, total seconds per phase and mean iterations."
+    phases = ["setup", "update", "solve", "teardown", "total"]
+    summary = records.groupby("suite")[phases].sum()
+    summary.insert(0, "scenarios", records.groupby("suite").size())
+    summary["mean_iterations"] = records.groupby("suite")["iterations"].mean()
+    return summary
+
+
+def report(path, profile_dir=None, top=15, out=sys.stdout):
+    "Print the phase summary, the slowest scenarios and, with `profile_dir`, the hottest functions."
+    records = read_records(path)
+    print(summarize(records).to_string(), file=out)
+    print(file=out)
+    print(records.sort_values("total", ascending=False).head(top).to_string(index=False), file=out)
+    if profile_dir:
+        files = [os.path.join(profile_dir, name) for name in sorted(os.listdir(profile_dir)) if name.endswith(".prof")]
+        if files:
+            print(file=out)
+            stats = pstats.Stats(*files, stream=out)
+            stats.files = []  # do not list every dump file
+            stats.sort_stats("cumulative").print_stats(top)
+
+
+if __name__ == "__main__":
+    report(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
@@ -0,0 +1,128 @@
+"""Media definitions shared by the suites, compiled into bound vectors.
+
+Media live in media.json. A medium lists the boundary reactions it opens
+as `reaction id: [lower bound, upper bound]`; every other boundary reaction
+is closed. A medium may extend another one and add or override bounds, and
+may name its `carbon_source` exchange reaction.
+
+`compile_medium` turns a medium into lower/upper bound arrays aligned to
+the positions of the boundary reactions in `model.reactions`.
+`apply_medium` compares them with the current bounds in one vectorized
+step and only touches the reactions whose bounds actually change, so
+switching between two media costs as many solver updates as the media
+differ in.
+"""
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+
+
+MEDIA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "media.json")
+
+CompiledMedium = namedtuple("CompiledMedium", ["name", "n_reactions", "indices", "lower", "upper"])
+
+
+def read_media(path=MEDIA_FILE):
+    "Load the media file."
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def medium_bounds(name, media=None):
+    "Resolve `extends` chains and return {reaction id: (lower, upper)} for a medium."
+    if media is None:
+        media = read_media()
+    definitions = media["media"]
+    if name not in definitions:
+        raise KeyError(f"Unknown medium: {name}")
+    definition = definitions[name]
+    bounds = {}
+    if "extends" in definition:
+        bounds.update(medium_bounds(definition["extends"], media))
+    for rxn_id, (lower, upper) in definition["bounds"].items():
+        bounds[rxn_id] = (lower, upper)
+    return bounds
+
+
+def medium_carbon_source(name, media=None):
+    "Exchange reaction id of the carbon source of a medium (inherited through `extends`), or None."
+    if media is None:
+        media = read_media()
+    definition = media["media"][name]
+    if "carbon_source" in definition:
+        return definition["carbon_source"]
+    if "extends" in definition:
+        return medium_carbon_source(definition["extends"], media)
+    return None
+
+
+def medium_hash(name, media=None):
+    "SHA-256 of the resolved bounds of a medium, for keying cached results."
+    bounds = medium_bounds(name, media)
+    payload = json.dumps(sorted((rxn_id, list(b)) for rxn_id, b in bounds.items()))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def compile_medium(model, name, media=None):
+    """Compile a medium into bound arrays for the boundary reactions of `model`.
+
+    The result is only valid for models with the same reaction list; add
+    or remove boundary reactions and the medium has to be compiled again.
+    """
+    bounds = medium_bounds(name, media)
+    missing = [rxn_id for rxn_id in bounds if rxn_id not in model.reactions]
+    if missing:
+        raise KeyError(f"Medium {name} opens reactions missing from the model: {missing}")
+
+    boundary = model.boundary
+    indices = np.array([model.reactions.index(rxn) for rxn in boundary], dtype=np.int64)
+    lower = np.zeros(len(boundary))
+    upper = np.zeros(len(boundary))
+    position = {rxn.id: i for i, rxn in enumerate(boundary)}
+    for rxn_id, (lb, ub) in bounds.items():
+        if rxn_id not in position:
+            raise ValueError(f"Medium {name} sets bounds on {rxn_id}, which is not a boundary reaction")
+        lower[position[rxn_id]] = lb
+        upper[position[rxn_id]] = ub
+    return CompiledMedium(name, len(model.reactions), indices, lower, upper)
+
+
+def apply_medium(model, medium):
+    """Set the boundary bounds of `model` to a compiled medium.
+
+    Only reactions whose bounds differ from the medium are updated. Inside a
+    model context the changes are undone on exit.
+    """
+    if len(model.reactions) != medium.n_reactions:
+        raise ValueError(f"Medium {medium.name} was compiled for a different reaction list")
+    reactions = [model.reactions[i] for i in medium.indices]
+    current = np.array([rxn.bounds for rxn in reactions]).reshape(-1, 2)
+    changed = np.flatnonzero((current[:, 0] != medium.lower) | (current[:, 1] != medium.upper))
+    for i in changed:
+        reactions[i].bounds = (float(medium.lower[i]), float(medium.upper[i]))
+    return len(changed)
+
+
+def set_medium(model, name, media=None):
+    "Compile and apply a medium in one go; returns the number of reactions changed."
+    return apply_medium(model, compile_medium(model, name, media))
+
+
+def without_element(model, medium, element):
+    """Copy of a compiled medium with no uptake of metabolites containing `element`.
+
+    Boundary reactions whose metabolite formula contains `element` keep
+    their secretion bound but lose their uptake bound. Returns the new
+    medium and the ids of the reactions that were supplying the element.
+    """
+    lower = medium.lower.copy()
+    closed = []
+    for position, i in enumerate(medium.indices):
+        rxn = model.reactions[i]
+        if lower[position] < 0 and any(element in met.elements for met in rxn.metabolites):
+            lower[position] = 0
+            closed.append(rxn.id)
+    return medium._replace(name=f"{medium.name} without {element}", lower=lower), closed
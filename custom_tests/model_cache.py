@@ -0,0 +1,66 @@
+"""On-disk cache of parsed models, keyed by the content hash of the SBML file.
+
+Parsing iMD1629.xml takes far longer than unpickling the resulting cobra
+model (solver problem included), so the first suite to load a given SBML
+file stores a snapshot and every later load is served from it. A snapshot
+is only reused when the SBML bytes are identical; any edit to the model
+produces a new hash and triggers a rebuild.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+
+import cobra
+import optlang
+from cobra.io import read_sbml_model
+
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".model_cache")
+
+
+def model_hash(path_to_model):
+    "SHA-256 of the SBML file contents."
+    digest = hashlib.sha256()
+    with open(path_to_model, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_path(path_to_model, cache_dir=CACHE_DIR):
+    "Location of the snapshot for the current contents of `path_to_model`."
+    # snapshots hold cobra and optlang objects and are only valid for the versions that wrote them
+    name = f"{model_hash(path_to_model)}-cobra{cobra.__version__}-optlang{optlang.__version__}.pkl"
+    return os.path.join(cache_dir, name)
+
+
+def load_model(path_to_model, cache_dir=CACHE_DIR):
+    """Return the model stored in `path_to_model`, using the snapshot cache.
+
+    Safe to call from several test workers at once: snapshots are written
+    to a temporary file and atomically renamed into place, so a reader
+    either sees a complete snapshot or none at all. A snapshot that cannot
+    be read or unpickled, for whatever reason, is treated as a cache miss.
+    """
+    snapshot = cache_path(path_to_model, cache_dir)
+    try:
+        with open(snapshot, "rb") as handle:
+            return pickle.load(handle)
+    except Exception:
+        # missing, truncated or not loadable with the installed libraries
+        pass
+
+    model = read_sbml_model(path_to_model)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            pickle.dump(model, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, snapshot)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return model
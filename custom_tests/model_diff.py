@@ -0,0 +1,187 @@
+"""Differences between two SBML versions and the screening scenarios they affect.
+
+Every reaction is reduced to hashes of its stoichiometry, bounds and GPR,
+every metabolite to hashes of its formula, charge and compartment;
+comparing the hashes of two versions gives the added, removed and changed
+entities.
+
+Only stoichiometry and bound changes alter the LPs of the suites (GPRs
+only matter for gene deletions). Such a change cannot affect a stored
+scenario if
+
+* the reaction is blocked in both versions with every boundary reaction
+  and a sink for every scenario metabolite open (a relaxation of every
+  scenario, as in network_index.py), and its bounds allow zero flux, or
+* the reaction is outside the network scope of the scenario (medium plus
+  substrate, see scope.py) in both versions. Like the Biolog prefilter
+  this relies on the currency metabolite heuristic; pass
+  reachability=False to only use the first, exact test.
+
+Results of unaffected scenarios are copied to the new model hash in the
+result store, so a suite run with IMD_RESULT_STORE only solves the
+affected scenarios:
+
+    git show HEAD~1:iMD1629.xml > /tmp/previous.xml
+    python model_diff.py /tmp/previous.xml ../iMD1629.xml
+"""
+import hashlib
+import sys
+
+from media import medium_hash, read_media, set_medium
+from model_cache import load_model, model_hash
+from network_index import is_blocked, open_boundary
+from result_store import ResultStore, open_store_from_env
+from scope import NetworkScope
+from variability import flux_ranges
+
+
+LP_ASPECTS = ("stoichiometry", "bounds")
+
+
+def _digest(value):
+    return hashlib.sha256(repr(value).encode()).hexdigest()[:16]
+
+
+def entity_hashes(model):
+    "Hashes of every reaction and metabolite of `model`, by kind, entity id and aspect."
+    reactions = {
+        rxn.id: {
+            "stoichiometry": _digest(sorted((met.id, float(c)) for met, c in rxn.metabolites.items())),
+            "bounds": _digest((float(rxn.lower_bound), float(rxn.upper_bound))),
+            "gpr": _digest(rxn.gene_reaction_rule),
+        }
+        for rxn in model.reactions
+    }
+    metabolites = {
+        met.id: {
+            "formula": _digest(met.formula),
+            "charge": _digest(met.charge),
+            "compartment": _digest(met.compartment),
+        }
+        for met in model.metabolites
+    }
+    return {"reactions": reactions, "metabolites": metabolites}
+
+
+def diff_hashes(old, new):
+    """Added, removed and changed entities between two `entity_hashes` results.
+
+    Changed entities map to the list of aspects that differ.
+    """
+    diff = {}
+    for kind in ("reactions", "metabolites"):
+        diff[f"added_{kind}"] = sorted(set(new[kind]) - set(old[kind]))
+        diff[f"removed_{kind}"] = sorted(set(old[kind]) - set(new[kind]))
+        diff[f"changed_{kind}"] = {
+            entity_id: [aspect for aspect in new[kind][entity_id] if new[kind][entity_id][aspect] != old[kind][entity_id][aspect]]
+            for entity_id in sorted(set(old[kind]) & set(new[kind]))
+            if new[kind][entity_id] != old[kind][entity_id]
+        }
+    return diff
+
+
+def lp_changed_reactions(diff):
+    "Ids of reactions added, removed or changed in stoichiometry or bounds."
+    changed = {rxn_id for rxn_id, aspects in diff["changed_reactions"].items() if set(aspects) & set(LP_ASPECTS)}
+    return sorted(changed | set(diff["added_reactions"]) | set(diff["removed_reactions"]))
+
+
+def blocked_in_relaxation(model, reaction_ids, sink_metabolites):
+    "Ids among `reaction_ids` that carry no flux in the relaxation and whose bounds allow zero flux."
+    reaction_ids = [rxn_id for rxn_id in reaction_ids if rxn_id in model.reactions]
+    with model:
+        allow_zero = {rxn_id for rxn_id in reaction_ids
+                      if model.reactions.get_by_id(rxn_id).lower_bound <= 0 <= model.reactions.get_by_id(rxn_id).upper_bound}
+        open_boundary(model)
+        for met_id in sorted(set(sink_metabolites)):
+            if met_id in model.metabolites:
+                model.add_boundary(model.metabolites.get_by_id(met_id), type="sink",
+                                   reaction_id=f"diff_sink_{met_id}", lb=-1000, ub=1000)
+        rows = flux_ranges(model, reaction_ids)
+    return {rxn_id for rxn_id in is_blocked(rows) if rxn_id in allow_zero}
+
+
+def _scenario_metabolite(key):
+    "Substrate of a Biolog scenario or demand metabolite of a precursor scenario, or None."
+    kind, _, metabolite_id = key.scenario.partition(":")
+    return metabolite_id if kind in ("biolog", "precursor") and metabolite_id != "None" else None
+
+
+def _scopes(model, keys, media_names):
+    "{key: ids of reactions in scope of the scenario} for the scenarios of one version."
+    scopes = {}
+    for medium in sorted({key.medium_hash for key in keys}):
+        with model:
+            set_medium(model, media_names[medium])
+            network_scope = NetworkScope(model)
+            for key in keys:
+                if key.medium_hash != medium:
+                    continue
+                kind = key.scenario.partition(":")[0]
+                substrate = _scenario_metabolite(key) if kind == "biolog" else None
+                seeds = [substrate] if substrate in model.metabolites else []
+                scopes[key] = network_scope.reactions_in_scope(seeds)
+    return scopes
+
+
+def affected_scenarios(old_model, new_model, diff, keys, reachability=True):
+    """Subset of the ScenarioKeys `keys` whose results `diff` may change.
+
+    Scenarios of an unknown kind or on a medium that is not in media.json
+    count as affected.
+    """
+    changed = lp_changed_reactions(diff)
+    if not changed:
+        return []
+    sink_metabolites = {_scenario_metabolite(key) for key in keys} - {None}
+    blocked_old = blocked_in_relaxation(old_model, changed, sink_metabolites)
+    blocked_new = blocked_in_relaxation(new_model, changed, sink_metabolites)
+    # a reaction missing from one version carries no flux there
+    relevant = {
+        rxn_id for rxn_id in changed
+        if not ((rxn_id not in old_model.reactions or rxn_id in blocked_old)
+                and (rxn_id not in new_model.reactions or rxn_id in blocked_new))
+    }
+    if not relevant:
+        return []
+
+    media_names = {medium_hash(name): name for name in read_media()["media"]}
+    known = [key for key in keys
+             if key.medium_hash in media_names and key.scenario.partition(":")[0] in ("biolog", "precursor")
+             and key.objective not in relevant]
+    if not reachability:
+        return list(keys)
+    old_scopes = _scopes(old_model, known, media_names)
+    new_scopes = _scopes(new_model, known, media_names)
+    unaffected = {key for key in known if not relevant & (old_scopes[key] | new_scopes[key])}
+    return [key for key in keys if key not in unaffected]
+
+
+def carry_forward(store, old_path, new_path, reachability=True):
+    """Copy the stored results of `old_path` that `new_path` cannot change to its model hash.
+
+    Returns (diff, affected ScenarioKeys of the old version, number of
+    results copied).
+    """
+    old_model, new_model = load_model(old_path), load_model(new_path)
+    diff = diff_hashes(entity_hashes(old_model), entity_hashes(new_model))
+    stored = store.results(model_hash(old_path))
+    affected = set(affected_scenarios(old_model, new_model, diff, [key for key, _ in stored], reachability))
+    new_hash = model_hash(new_path)
+    carried = [(key._replace(model_hash=new_hash), result) for key, result in stored if key not in affected]
+    store.put_many(carried)
+    return diff, sorted(affected), len(carried)
+
+
+if __name__ == "__main__":
+    # python model_diff.py <old sbml> <new sbml> [--no-reachability]
+    store = open_store_from_env() or ResultStore()
+    diff, affected, copied = carry_forward(store, sys.argv[1], sys.argv[2],
+                                           reachability="--no-reachability" not in sys.argv)
+    for name, entities in diff.items():
+        print(f"{name}: {len(entities)}")
+    for rxn_id, aspects in diff["changed_reactions"].items():
+        print(f"  {rxn_id}: {', '.join(aspects)}")
+    print(f"{copied} stored results reused, {len(affected)} scenarios to re-run")
+    for key in affected:
+        print(f"  {key.scenario} ({key.objective})")
@@ -0,0 +1,180 @@
+"""Base LPs exported once per model version and medium, solved straight in GLPK.
+
+`export_problem` builds the solver problem of a medium through cobra once
+(with closed sinks for the Biolog substrates or closed demands for the
+precursors, and `Biomass_reaction_1` as objective) and writes it as a
+free MPS or CPLEX LP file to the model cache, together with a JSON file
+mapping each reaction to its forward and reverse column. Files are keyed
+by model hash, medium hash and the added sinks and demands.
+
+`BatchRunner` reads such a file directly into GLPK and runs scenarios as
+deltas on it: reaction bounds and the objective reaction are changed,
+solved warm-started from the previous basis, and restored. No cobra or
+optlang object is built on this path.
+
+The suites use it when IMD_NATIVE_LP=1.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import swiglpk as glpk
+
+from biolog import BIOMASS_REACTION, SINK_BOUNDS, add_closed_sinks, plate_results
+from media import medium_hash, set_medium
+from model_cache import CACHE_DIR, load_model, model_hash
+
+
+NATIVE_ENV = "IMD_NATIVE_LP"
+NATIVE_SOLVER = "glpk_native"
+GLPK_STATUS = {glpk.GLP_OPT: "optimal", glpk.GLP_NOFEAS: "infeasible", glpk.GLP_UNBND: "unbounded"}
+
+
+def problem_path(path_to_model, medium, sink_metabolites=(), demand_metabolites=(), file_format="mps",
+                 cache_dir=CACHE_DIR):
+    "Cache file of the base problem; the column map lives next to it with a .json suffix."
+    extras = hashlib.sha256(json.dumps([sorted(sink_metabolites), sorted(demand_metabolites)]).encode()).hexdigest()
+    name = f"problem-{model_hash(path_to_model)}-{medium_hash(medium)}-{extras[:16]}.{file_format}"
+    return os.path.join(cache_dir, name)
+
+
+def export_problem(path_to_model, medium, sink_metabolites=(), demand_metabolites=(), file_format="mps",
+                   cache_dir=CACHE_DIR):
+    """Write the base problem for `medium` unless it is cached; returns its path.
+
+    Sinks are named SK_<id> as in biolog.add_closed_sinks, demands DM_<id>
+    as cobra names them; both are closed.
+    """
+    path = problem_path(path_to_model, medium, sink_metabolites, demand_metabolites, file_format, cache_dir)
+    if os.path.exists(path) and os.path.exists(f"{path}.json"):
+        return path
+
+    model = load_model(path_to_model)
+    model.solver = "glpk"
+    set_medium(model, medium)
+    add_closed_sinks(model, sink_metabolites)
+    for met_id in demand_metabolites:
+        if met_id in model.metabolites and f"DM_{met_id}" not in model.reactions:
+            model.add_boundary(model.metabolites.get_by_id(met_id), type="demand", lb=0, ub=0)
+    model.objective = BIOMASS_REACTION
+    model.solver.update()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=f".{file_format}")
+    os.close(fd)
+    if file_format == "mps":
+        code = glpk.glp_write_mps(model.solver.problem, glpk.GLP_MPS_FILE, None, tmp_path)
+    elif file_format == "lp":
+        code = glpk.glp_write_lp(model.solver.problem, None, tmp_path)
+    else:
+        raise ValueError(f"Unknown problem format: {file_format}")
+    if code != 0:
+        raise RuntimeError(f"GLPK could not write {tmp_path}")
+    columns = {rxn.id: [rxn.id, rxn.reverse_id] for rxn in model.reactions}
+    with open(f"{tmp_path}.json", "w") as handle:
+        json.dump({"objective": BIOMASS_REACTION, "columns": columns}, handle)
+    os.replace(f"{tmp_path}.json", f"{path}.json")
+    os.replace(tmp_path, path)
+    return path
+
+
+def _split_bounds(lower, upper):
+    "Bounds of the forward and reverse column for reaction bounds (lower, upper)."
+    return (max(lower, 0), max(upper, 0)), (max(-upper, 0), max(-lower, 0))
+
+
+class BatchRunner:
+    "One exported base problem in GLPK, solved under per-scenario deltas."
+
+    def __init__(self, path):
+        self.problem = glpk.glp_create_prob()
+        if path.endswith(".mps"):
+            code = glpk.glp_read_mps(self.problem, glpk.GLP_MPS_FILE, None, path)
+        else:
+            code = glpk.glp_read_lp(self.problem, None, path)
+        if code != 0:
+            raise RuntimeError(f"GLPK could not read {path}")
+        with open(f"{path}.json") as handle:
+            columns = json.load(handle)
+        glpk.glp_create_index(self.problem)
+        self.columns = {rxn_id: tuple(glpk.glp_find_col(self.problem, name) for name in names)
+                        for rxn_id, names in columns["columns"].items()}
+        self.objective = columns["objective"]
+        glpk.glp_set_obj_dir(self.problem, glpk.GLP_MAX)
+        glpk.glp_scale_prob(self.problem, glpk.GLP_SF_AUTO)
+        self.parameters = glpk.glp_smcp()
+        glpk.glp_init_smcp(self.parameters)
+        self.parameters.msg_lev = glpk.GLP_MSG_OFF
+        self.parameters.presolve = glpk.GLP_OFF
+        glpk.glp_adv_basis(self.problem, 0)
+
+    def close(self):
+        glpk.glp_delete_prob(self.problem)
+
+    def _column_bounds(self, column):
+        return glpk.glp_get_col_lb(self.problem, column), glpk.glp_get_col_ub(self.problem, column)
+
+    def _set_column_bounds(self, column, lower, upper):
+        kind = glpk.GLP_FX if lower == upper else glpk.GLP_DB
+        glpk.glp_set_col_bnds(self.problem, column, kind, lower, upper)
+
+    def _set_objective(self, rxn_id, coefficient):
+        forward, reverse = self.columns[rxn_id]
+        glpk.glp_set_obj_coef(self.problem, forward, coefficient)
+        glpk.glp_set_obj_coef(self.problem, reverse, -coefficient)
+
+    def flux(self, rxn_id):
+        "Flux of a reaction in the last solution."
+        forward, reverse = self.columns[rxn_id]
+        return glpk.glp_get_col_prim(self.problem, forward) - glpk.glp_get_col_prim(self.problem, reverse)
+
+    def solve(self, bounds=None, objective=None, flux_ids=()):
+        """Maximise `objective` (default the exported one) under {reaction id: (lower, upper)}.
+
+        Returns (status, objective value, {reaction id: flux} for
+        `flux_ids`); the base problem is restored afterwards.
+        """
+        saved = []
+        for rxn_id, (lower, upper) in (bounds or {}).items():
+            for column, (column_lower, column_upper) in zip(self.columns[rxn_id], _split_bounds(lower, upper)):
+                saved.append((column, self._column_bounds(column)))
+                self._set_column_bounds(column, column_lower, column_upper)
+        if objective is not None:
+            self._set_objective(self.objective, 0.0)
+            self._set_objective(objective, 1.0)
+        try:
+            if glpk.glp_simplex(self.problem, self.parameters) != 0:
+                # the previous basis is no longer valid; start from a fresh one
+                glpk.glp_adv_basis(self.problem, 0)
+                glpk.glp_simplex(self.problem, self.parameters)
+            status = GLPK_STATUS.get(glpk.glp_get_status(self.problem), "undefined")
+            value = glpk.glp_get_obj_val(self.problem) if status == "optimal" else float("nan")
+            fluxes = {rxn_id: self.flux(rxn_id) if status == "optimal" else float("nan") for rxn_id in flux_ids}
+        finally:
+            for column, (lower, upper) in reversed(saved):
+                self._set_column_bounds(column, lower, upper)
+            if objective is not None:
+                self._set_objective(objective, 0.0)
+                self._set_objective(self.objective, 1.0)
+        return status, value, fluxes
+
+
+def screen_carbon_sources_native(path_to_model, plate):
+    "The Biolog plate on the exported biolog_base problem; layout of biolog.screen_carbon_sources."
+    path = export_problem(path_to_model, "biolog_base", sink_metabolites=list(plate["metabolite_id"]))
+    runner = BatchRunner(path)
+    rows = []
+    try:
+        for metabolite_id in plate["metabolite_id"]:
+            sink_id = f"SK_{metabolite_id}"
+            if sink_id not in runner.columns:
+                rows.append(("missing_metabolite", float("nan"), 0.0))
+                continue
+            start = time.perf_counter()
+            status, objective_value, _ = runner.solve({sink_id: SINK_BOUNDS})
+            rows.append((status, objective_value, time.perf_counter() - start))
+    finally:
+        runner.close()
+    return plate_results(plate, rows)
@@ -0,0 +1,145 @@
+"""Blocked reactions, dead-end and orphan metabolites of a model version.
+
+The index is cached next to the model snapshots under the SBML content
+hash, so it is only rebuilt when iMD1629.xml changes.
+
+* dead-end metabolites are produced but never consumed, orphan metabolites
+  consumed but never produced, taking reaction reversibility into account
+  (from the stoichiometric matrix, no LP)
+* blocked reactions cannot carry flux even with every boundary reaction
+  fully open (min/max of every reaction in one warm-started pass)
+* blocked sinks: for the metabolites the screens offer through a sink
+  (e.g. the Biolog plate), whether that sink can carry flux with every
+  boundary reaction and all of those sinks open together. This relaxes
+  every single-substrate scenario, so a sink that is blocked here is blocked
+  in each of them. The substrate then cannot change growth and the screen
+  can skip its LP.
+"""
+import json
+import os
+import tempfile
+
+import numpy as np
+from optlang.symbolics import Zero
+from cobra import Reaction
+from cobra.util.array import create_stoichiometric_matrix
+
+from model_cache import CACHE_DIR, load_model, model_hash
+from variability import flux_ranges
+
+
+ZERO_CUTOFF = 1e-9
+
+
+def _producing_and_consuming(model):
+    "Boolean arrays: can each metabolite be produced / consumed by some reaction?"
+    stoichiometry = create_stoichiometric_matrix(model, array_type="lil").tocsr()
+    bounds = np.array([rxn.bounds for rxn in model.reactions]).reshape(-1, 2)
+    forward = (bounds[:, 1] > 0).astype(np.int32)
+    reverse = (bounds[:, 0] < 0).astype(np.int32)
+    positive = (stoichiometry > 0).astype(np.int32)
+    negative = (stoichiometry < 0).astype(np.int32)
+    produced = (positive @ forward + negative @ reverse) > 0
+    consumed = (negative @ forward + positive @ reverse) > 0
+    return produced, consumed
+
+
+def dead_end_metabolites(model):
+    "Ids of metabolites that can be produced but not consumed."
+    produced, consumed = _producing_and_consuming(model)
+    return [met.id for met, p, c in zip(model.metabolites, produced, consumed) if p and not c]
+
+
+def orphan_metabolites(model):
+    "Ids of metabolites that can be consumed but not produced."
+    produced, consumed = _producing_and_consuming(model)
+    return [met.id for met, p, c in zip(model.metabolites, produced, consumed) if c and not p]
+
+
+def open_boundary(model):
+    "Open every boundary reaction in both directions and clear the objective."
+    for rxn in model.boundary:
+        rxn.bounds = (min(rxn.lower_bound, -1000), max(rxn.upper_bound, 1000))
+    model.objective = Zero
+
+
+def is_blocked(rows):
+    """Ids from `flux_ranges` rows whose minimum and maximum are both zero.
+
+    A failed solve (NaN) proves nothing, so such reactions are not blocked.
+    """
+    return [rxn_id for rxn_id, minimum, maximum in rows
+            if np.isfinite(minimum) and np.isfinite(maximum) and max(abs(minimum), abs(maximum)) < ZERO_CUTOFF]
+
+
+def blocked_reactions(model):
+    "Ids of reactions that carry no flux with every boundary reaction open."
+    with model:
+        open_boundary(model)
+        return is_blocked(flux_ranges(model, [rxn.id for rxn in model.reactions]))
+
+
+def blocked_sink_metabolites(model, metabolite_ids):
+    "Ids among `metabolite_ids` whose sink stays blocked with all boundaries and all of these sinks open."
+    metabolite_ids = [met_id for met_id in metabolite_ids if met_id in model.metabolites]
+    with model:
+        open_boundary(model)
+        sinks = []
+        for met_id in metabolite_ids:
+            sink = Reaction(f"index_sink_{met_id}", lower_bound=-1000, upper_bound=1000)
+            sink.add_metabolites({model.metabolites.get_by_id(met_id): -1})
+            sinks.append(sink)
+        model.add_reactions(sinks)
+        blocked = set(is_blocked(flux_ranges(model, [sink.id for sink in sinks])))
+    return sorted(met_id for met_id, sink in zip(metabolite_ids, sinks) if sink.id in blocked)
+
+
+def build_network_index(model, sink_metabolites=()):
+    "Compute the index for `model` (see module docstring)."
+    return {
+        "dead_end_metabolites": dead_end_metabolites(model),
+        "orphan_metabolites": orphan_metabolites(model),
+        "blocked_reactions": blocked_reactions(model),
+        "sink_metabolites": sorted(set(sink_metabolites)),
+        "blocked_sink_metabolites": blocked_sink_metabolites(model, sorted(set(sink_metabolites))),
+    }
+
+
+def index_path(path_to_model, cache_dir=CACHE_DIR):
+    "Cache file of the index for the current contents of `path_to_model`."
+    return os.path.join(cache_dir, f"network_index-{model_hash(path_to_model)}.json")
+
+
+def load_network_index(path_to_model, sink_metabolites=(), model=None, cache_dir=CACHE_DIR):
+    """Return the cached index for the current SBML file, building it if needed.
+
+    The blocked-sink part is recomputed when `sink_metabolites` asks for
+    metabolites the cached index does not cover. `model` saves a load when
+    the caller already has the unmodified model at hand.
+    """
+    path = index_path(path_to_model, cache_dir)
+    try:
+        with open(path) as handle:
+            index = json.load(handle)
+    except (FileNotFoundError, ValueError):
+        index = None
+
+    wanted = set(sink_metabolites)
+    if index is not None and wanted <= set(index["sink_metabolites"]):
+        return index
+
+    if model is None:
+        model = load_model(path_to_model)
+    if index is None:
+        index = build_network_index(model, wanted)
+    else:
+        covered = sorted(wanted | set(index["sink_metabolites"]))
+        index["sink_metabolites"] = covered
+        index["blocked_sink_metabolites"] = blocked_sink_metabolites(model, covered)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    with os.fdopen(fd, "w") as handle:
+        json.dump(index, handle, indent=1)
+    os.replace(tmp_path, path)
+    return index
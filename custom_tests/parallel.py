@@ -0,0 +1,80 @@
+"""Process pool whose workers each hold one loaded, prepared model.
+
+Every worker loads the model once in its initializer (through the snapshot
+cache of model_cache), switches it to the solver selected in solvers.py and
+applies `prepare` to it, e.g. to set the medium.
+Tasks are then called as `task(model, item)` and their results are returned
+in the order of `items`, regardless of which worker finished first.
+"""
+import functools
+import multiprocessing
+import os
+
+from model_cache import load_model
+from solvers import configure_solver
+
+
+_worker_model = None
+
+
+def _init_worker(path_to_model, prepare):
+    global _worker_model
+    _worker_model = load_model(path_to_model)
+    configure_solver(_worker_model, path_to_model)
+    if prepare is not None:
+        prepare(_worker_model)
+
+
+def _call(task, item):
+    return task(_worker_model, item)
+
+
+def default_processes():
+    "Number of worker processes used when none is given."
+    return os.cpu_count() or 1
+
+
+def run_parallel(path_to_model, task, items, processes=None, prepare=None, chunksize=1):
+    """Run `task(model, item)` for every item across a pool of worker processes.
+
+    `task` and `prepare` must be module-level functions so they can be
+    sent to the workers. Results come back in the order of `items`.
+    """
+    items = list(items)
+    if processes is None:
+        processes = default_processes()
+    processes = max(1, min(processes, len(items)))
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(path_to_model, prepare)) as pool:
+        return pool.map(functools.partial(_call, task), items, chunksize=chunksize)
+
+
+def _call_indexed(task, indexed_item):
+    index, item = indexed_item
+    return index, task(_worker_model, item)
+
+
+def imap_parallel(path_to_model, task, items, processes=None, prepare=None):
+    """Like `run_parallel`, but yield (index, result) pairs as tasks finish.
+
+    Lets callers stream results to disk instead of waiting for the whole
+    pool; the index is the position of the item in `items`.
+    """
+    items = list(items)
+    if processes is None:
+        processes = default_processes()
+    processes = max(1, min(processes, len(items)))
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(path_to_model, prepare)) as pool:
+        yield from pool.imap_unordered(functools.partial(_call_indexed, task), enumerate(items))
+
+
+def split_evenly(items, n_chunks):
+    "Split a sequence into at most `n_chunks` contiguous, similarly sized chunks."
+    n_chunks = max(1, min(n_chunks, len(items)))
+    size, extra = divmod(len(items), n_chunks)
+    chunks = []
+    start = 0
+    for i in range(n_chunks):
+        stop = start + size + (1 if i < extra else 0)
+        chunks.append(items[start:stop])
+        start = stop
+    return chunks
@@ -0,0 +1,118 @@
+"""Growth over a grid of substrate uptake and oxygen uptake for every plate substrate.
+
+The Biolog screen opens each sink without a rate limit. Here the sink of
+each substrate is opened up to a range of uptake rates, and the oxygen
+exchange (EX_1503_e) is limited to a range of uptake rates, on the Biolog
+base medium. Each substrate is one problem: only the two bounds change
+between grid points, and the grid is walked in a serpentine so each LP
+starts next to the previous one.
+
+Substrates are spread over the process pool. Results go into one 3D
+.npy array (substrate x uptake x oxygen, float32, NaN where the LP is not
+optimal) that the workers fill in place through a memory map; a JSON file
+next to it holds the axes. `load_phase_planes` memory-maps it again, so
+slicing one substrate or one oxygen level does not read the rest.
+
+    python phase_plane.py <output .npy> [processes]
+"""
+import functools
+import json
+import sys
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from biolog import BIOMASS_REACTION, SINK_BOUNDS, slim_solve, add_closed_sinks, read_plate, set_biolog_medium
+from parallel import default_processes, run_parallel, split_evenly
+
+
+OXYGEN_EXCHANGE = "EX_1503_e"
+UPTAKE_RATES = np.linspace(0, 10, 11)
+OXYGEN_RATES = np.linspace(0, 20, 11)
+
+
+def _serpentine(n_rows, n_columns):
+    "Grid indices row by row, every other row backwards, so neighbours follow each other."
+    for i in range(n_rows):
+        columns = range(n_columns) if i % 2 == 0 else range(n_columns - 1, -1, -1)
+        for j in columns:
+            yield i, j
+
+
+def phase_plane_values(model, metabolite_ids, uptake_rates, oxygen_rates):
+    """Biomass flux over the uptake x oxygen grid for each of `metabolite_ids`.
+
+    `model` should carry the Biolog base medium; it is left unchanged.
+    Returns an array (substrate x uptake x oxygen); substrates missing
+    from the model are all NaN.
+    """
+    values = np.full((len(metabolite_ids), len(uptake_rates), len(oxygen_rates)), np.nan, dtype=np.float32)
+    with model:
+        model.objective = BIOMASS_REACTION
+        oxygen = model.reactions.get_by_id(OXYGEN_EXCHANGE)
+        sinks = add_closed_sinks(model, metabolite_ids)
+        for k, metabolite_id in enumerate(metabolite_ids):
+            if metabolite_id not in sinks:
+                continue
+            sink = sinks[metabolite_id]
+            for i, j in _serpentine(len(uptake_rates), len(oxygen_rates)):
+                sink.bounds = (-uptake_rates[i], SINK_BOUNDS[1])
+                oxygen.lower_bound = -oxygen_rates[j]
+                status, objective_value = slim_solve(model)
+                if status == "optimal":
+                    values[k, i, j] = objective_value
+            sink.bounds = (0, 0)
+    return values
+
+
+def _phase_plane_chunk(model, task, uptake_rates, oxygen_rates):
+    "Fill rows `start`.. of the output array for one chunk of substrates."
+    path, start, metabolite_ids = task
+    values = phase_plane_values(model, metabolite_ids, uptake_rates, oxygen_rates)
+    output = open_memmap(path, mode="r+")
+    output[start:start + len(metabolite_ids)] = values
+    output.flush()
+    return len(metabolite_ids)
+
+
+def phase_planes(path_to_model, output, plate, uptake_rates=UPTAKE_RATES, oxygen_rates=OXYGEN_RATES, processes=None):
+    """Compute the phase plane of every plate substrate into `output` (.npy).
+
+    Returns the memory-mapped result, as `load_phase_planes` does.
+    """
+    metabolite_ids = list(plate["metabolite_id"])
+    uptake_rates = [float(rate) for rate in uptake_rates]
+    oxygen_rates = [float(rate) for rate in oxygen_rates]
+    array = open_memmap(output, mode="w+", dtype=np.float32,
+                        shape=(len(metabolite_ids), len(uptake_rates), len(oxygen_rates)))
+    array[:] = np.nan
+    array.flush()
+    del array
+    with open(f"{output}.json", "w") as handle:
+        json.dump({"substrates": metabolite_ids, "uptake_rates": uptake_rates, "oxygen_rates": oxygen_rates,
+                   "oxygen_exchange": OXYGEN_EXCHANGE}, handle, indent=1)
+
+    if processes is None:
+        processes = default_processes()
+    tasks = []
+    start = 0
+    for chunk in split_evenly(metabolite_ids, processes * 4):
+        tasks.append((output, start, chunk))
+        start += len(chunk)
+    task = functools.partial(_phase_plane_chunk, uptake_rates=uptake_rates, oxygen_rates=oxygen_rates)
+    run_parallel(path_to_model, task, tasks, processes=processes, prepare=set_biolog_medium)
+    return load_phase_planes(output)
+
+
+def load_phase_planes(path):
+    "(read-only memory-mapped array, substrate ids, uptake rates, oxygen rates) of a stored sweep."
+    with open(f"{path}.json") as handle:
+        axes = json.load(handle)
+    return np.load(path, mmap_mode="r"), axes["substrates"], axes["uptake_rates"], axes["oxygen_rates"]
+
+
+if __name__ == "__main__":
+    output = sys.argv[1] if len(sys.argv) > 1 else "biolog_phase_planes.npy"
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    array, substrates, _, _ = phase_planes("../iMD1629.xml", output, read_plate(), processes=processes)
+    print(f"{len(substrates)} substrates, grid {array.shape[1]} x {array.shape[2]} in {output}")
@@ -0,0 +1,129 @@
+"""Carbon x nitrogen source phenotype matrix (PM1/PM2 x PM3 style).
+
+The nitrogen-free base is the Biolog base medium with the uptake of every
+nitrogen-containing boundary metabolite closed (see
+media.without_element); the exchanges closed this way (e.g. ammonium)
+become the first nitrogen sources of the matrix, followed by the
+metabolites in biolog_nitrogen_sources.csv, which are offered through
+sinks. Carbon sources come from the Biolog carbon plate.
+
+The base medium is applied as one bulk bound update, then one carbon and
+one nitrogen source are opened at a time on the same solver problem.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from biolog import BIOMASS_REACTION, SINK_BOUNDS, slim_solve, add_closed_sinks, set_biolog_medium
+from media import apply_medium, compile_medium, without_element
+from model_cache import load_model
+from parallel import default_processes, run_parallel, split_evenly
+
+
+NITROGEN_SOURCES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "biolog_nitrogen_sources.csv")
+BASE_MEDIUM = "biolog_base"
+
+
+def read_nitrogen_sources(path=NITROGEN_SOURCES_FILE):
+    "Load the nitrogen source table (metabolite id, name)."
+    return pd.read_csv(path, dtype=str)
+
+
+def _nitrogen_exchanges(model):
+    """Apply the nitrogen-free base medium to `model`.
+
+    Returns [(label, reaction, open bounds)] for the boundary reactions that
+    supplied nitrogen in the base medium, labelled by their metabolite.
+    """
+    base = compile_medium(model, BASE_MEDIUM)
+    nitrogen_free, closed = without_element(model, base, "N")
+    if not closed:
+        raise ValueError(f"{BASE_MEDIUM} has no nitrogen-containing uptake to replace")
+    apply_medium(model, nitrogen_free)
+    position = {index: p for p, index in enumerate(base.indices)}
+    exchanges = []
+    for rxn_id in closed:
+        rxn = model.reactions.get_by_id(rxn_id)
+        p = position[model.reactions.index(rxn)]
+        exchanges.append((next(iter(rxn.metabolites)).id, rxn, (float(base.lower[p]), float(base.upper[p]))))
+    return exchanges
+
+
+def _matrix_values(model, carbon_ids, nitrogen_ids, columns):
+    """(row, column, objective value) for the given nitrogen columns and all carbon rows.
+
+    Nitrogen columns are the medium exchanges from `_nitrogen_exchanges`
+    followed by `nitrogen_ids`; `columns` selects which of them to compute,
+    so the matrix can be split across workers.
+    """
+    values = []
+    with model:
+        model.objective = BIOMASS_REACTION
+        nitrogen = [(rxn, open_bounds) for _, rxn, open_bounds in _nitrogen_exchanges(model)]
+        sinks = add_closed_sinks(model, list(carbon_ids) + list(nitrogen_ids))
+        nitrogen += [(sinks.get(met_id), SINK_BOUNDS) for met_id in nitrogen_ids]
+        for column in columns:
+            nitrogen_rxn, open_bounds = nitrogen[column]
+            if nitrogen_rxn is None:
+                continue
+            closed_bounds = nitrogen_rxn.bounds
+            nitrogen_rxn.bounds = open_bounds
+            for row, carbon_id in enumerate(carbon_ids):
+                if carbon_id not in sinks:
+                    continue
+                carbon_sink = sinks[carbon_id]
+                carbon_sink.bounds = SINK_BOUNDS
+                status, objective_value = slim_solve(model)
+                values.append((row, column, objective_value if status == "optimal" else float("nan")))
+                # a metabolite used as both sources shares one sink
+                if carbon_sink is not nitrogen_rxn:
+                    carbon_sink.bounds = (0, 0)
+            nitrogen_rxn.bounds = closed_bounds
+    return values
+
+
+def _column_labels(model, nitrogen_ids):
+    with model:
+        return [label for label, _, _ in _nitrogen_exchanges(model)] + list(nitrogen_ids)
+
+
+def _matrix(carbon_ids, labels, values):
+    matrix = np.full((len(carbon_ids), len(labels)), np.nan)
+    for row, column, objective_value in values:
+        matrix[row, column] = objective_value
+    return pd.DataFrame(matrix, index=pd.Index(carbon_ids, name="carbon_source"),
+                        columns=pd.Index(labels, name="nitrogen_source"))
+
+
+def carbon_nitrogen_matrix(model, carbon_plate, nitrogen_sources):
+    """`Biomass_reaction_1` value for every carbon x nitrogen source combination.
+
+    `model` should carry the Biolog base medium (biolog.set_biolog_medium);
+    it is left unchanged. NaN marks combinations whose LP is not optimal,
+    values above GROWTH_THRESHOLD are growth.
+    """
+    carbon_ids = list(carbon_plate["metabolite_id"])
+    nitrogen_ids = list(nitrogen_sources["metabolite_id"])
+    labels = _column_labels(model, nitrogen_ids)
+    return _matrix(carbon_ids, labels, _matrix_values(model, carbon_ids, nitrogen_ids, range(len(labels))))
+
+
+def _matrix_chunk(model, task):
+    carbon_ids, nitrogen_ids, columns = task
+    return _matrix_values(model, carbon_ids, nitrogen_ids, columns)
+
+
+def carbon_nitrogen_matrix_parallel(path_to_model, carbon_plate, nitrogen_sources, processes=None):
+    "`carbon_nitrogen_matrix` with the nitrogen columns spread over the process pool."
+    carbon_ids = list(carbon_plate["metabolite_id"])
+    nitrogen_ids = list(nitrogen_sources["metabolite_id"])
+    model = load_model(path_to_model)
+    set_biolog_medium(model)
+    labels = _column_labels(model, nitrogen_ids)
+    if processes is None:
+        processes = default_processes()
+    tasks = [(carbon_ids, nitrogen_ids, columns)
+             for columns in split_evenly(list(range(len(labels))), processes * 2)]
+    results = run_parallel(path_to_model, _matrix_chunk, tasks, processes=processes, prepare=set_biolog_medium)
+    return _matrix(carbon_ids, labels, [value for chunk in results for value in chunk])
@@ -0,0 +1,195 @@
+"""Golden-result store for screening scenarios (SQLite).
+
+Every scenario result is stored under (model hash, medium hash, objective,
+scenario, solver): solver status, objective value and selected fluxes.
+While neither iMD1629.xml, the medium nor the solver changes, a stored
+result is served instead of solving the LP again. Only results of an
+actual optimisation belong in the store, not heuristic or feasibility-only
+answers.
+
+A set of results can be accepted as the reference snapshot; results of a
+later model version are then compared with the last accepted result of
+the same (medium, objective, scenario, solver) and differences beyond the
+tolerances are reported as regressions:
+
+    python result_store.py accept ../iMD1629.xml
+    python result_store.py check ../iMD1629.xml [absolute tol] [relative tol]
+
+The suites use the store when IMD_RESULT_STORE is set, either to "1" for
+the default location or to a database path.
+"""
+import json
+import math
+import os
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+
+import pandas as pd
+
+from model_cache import CACHE_DIR, model_hash
+
+
+STORE_ENV = "IMD_RESULT_STORE"
+# results.sqlite predates the solver column
+STORE_FILE = os.path.join(CACHE_DIR, "results-v2.sqlite")
+ABSOLUTE_TOLERANCE = 1e-6
+RELATIVE_TOLERANCE = 1e-4
+
+ScenarioKey = namedtuple("ScenarioKey", ["model_hash", "medium_hash", "objective", "scenario", "solver"])
+Result = namedtuple("Result", ["status", "objective_value", "fluxes"])
+
+
+class ResultStore:
+    "Scenario results and accepted snapshots in one SQLite file."
+
+    def __init__(self, path=STORE_FILE):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # several test workers may share the file
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS results (
+                model_hash TEXT, medium_hash TEXT, objective TEXT, scenario TEXT, solver TEXT,
+                status TEXT, objective_value REAL, fluxes TEXT, created REAL,
+                PRIMARY KEY (model_hash, medium_hash, objective, scenario, solver)
+            );
+            CREATE TABLE IF NOT EXISTS accepted (
+                medium_hash TEXT, objective TEXT, scenario TEXT, solver TEXT, model_hash TEXT,
+                status TEXT, objective_value REAL, fluxes TEXT, accepted REAL,
+                PRIMARY KEY (medium_hash, objective, scenario, solver)
+            );
+        """)
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(results)")]
+        if "solver" not in columns:
+            self.connection.close()
+            raise ValueError(f"{path} was written before results were keyed by solver; use a new file")
+
+    def close(self):
+        self.connection.close()
+
+    def get(self, key):
+        "Stored Result for a ScenarioKey, or None."
+        row = self.connection.execute(
+            "SELECT status, objective_value, fluxes FROM results "
+            "WHERE model_hash = ? AND medium_hash = ? AND objective = ? AND scenario = ? AND solver = ?", tuple(key)
+        ).fetchone()
+        if row is None:
+            return None
+        return _result(*row)
+
+    def put(self, key, result):
+        "Store (or replace) the Result of a ScenarioKey."
+        self.put_many([(key, result)])
+
+    def put_many(self, items):
+        "Store (or replace) the Result of each (ScenarioKey, Result) in one transaction."
+        created = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [tuple(key) + _row(result) + (created,) for key, result in items],
+            )
+
+    def results(self, model_hash):
+        "[(ScenarioKey, Result)] of every stored scenario of a model version."
+        rows = self.connection.execute(
+            "SELECT model_hash, medium_hash, objective, scenario, solver, status, objective_value, fluxes "
+            "FROM results WHERE model_hash = ?", (model_hash,)
+        ).fetchall()
+        return [(ScenarioKey(*row[:5]), _result(*row[5:])) for row in rows]
+
+    def accept(self, model_hash):
+        "Make all stored results of a model version the reference snapshot."
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT OR REPLACE INTO accepted "
+                "SELECT medium_hash, objective, scenario, solver, model_hash, status, objective_value, fluxes, ? "
+                "FROM results WHERE model_hash = ?", (time.time(), model_hash)
+            )
+        return cursor.rowcount
+
+    def regressions(self, model_hash, absolute_tolerance=ABSOLUTE_TOLERANCE, relative_tolerance=RELATIVE_TOLERANCE):
+        """Scenarios of a model version that differ from the accepted snapshot.
+
+        Returns a DataFrame with one row per differing status, objective
+        value or flux (scenario, objective, solver, quantity, accepted, current).
+        Scenarios without an accepted result are not reported.
+        """
+        rows = self.connection.execute(
+            "SELECT r.objective, r.scenario, r.solver, a.status, a.objective_value, a.fluxes, "
+            "r.status, r.objective_value, r.fluxes FROM results r JOIN accepted a "
+            "ON r.medium_hash = a.medium_hash AND r.objective = a.objective AND r.scenario = a.scenario "
+            "AND r.solver = a.solver "
+            "WHERE r.model_hash = ?", (model_hash,)
+        ).fetchall()
+        differences = []
+        for objective, scenario, solver, *values in rows:
+            accepted = _result(*values[:3])
+            current = _result(*values[3:])
+            if accepted.status != current.status:
+                differences.append((scenario, objective, solver, "status", accepted.status, current.status))
+            if not _close(accepted.objective_value, current.objective_value, absolute_tolerance, relative_tolerance):
+                differences.append((scenario, objective, solver, "objective_value", accepted.objective_value,
+                                    current.objective_value))
+            for rxn_id in sorted(set(accepted.fluxes) & set(current.fluxes)):
+                if not _close(accepted.fluxes[rxn_id], current.fluxes[rxn_id], absolute_tolerance, relative_tolerance):
+                    differences.append((scenario, objective, solver, rxn_id, accepted.fluxes[rxn_id],
+                                        current.fluxes[rxn_id]))
+        return pd.DataFrame(differences, columns=["scenario", "objective", "solver", "quantity", "accepted", "current"])
+
+
+def _row(result):
+    value = result.objective_value
+    value = None if value is None or math.isnan(value) else float(value)
+    return result.status, value, json.dumps({rxn_id: float(flux) for rxn_id, flux in result.fluxes.items()})
+
+
+def _result(status, objective_value, fluxes):
+    return Result(status, float("nan") if objective_value is None else objective_value, json.loads(fluxes))
+
+
+def _close(a, b, absolute_tolerance, relative_tolerance):
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    return math.isclose(a, b, abs_tol=absolute_tolerance, rel_tol=relative_tolerance)
+
+
+def open_store_from_env():
+    "The ResultStore selected by IMD_RESULT_STORE, or None when it is unset."
+    setting = os.environ.get(STORE_ENV)
+    if not setting or setting == "0":
+        return None
+    return ResultStore(STORE_FILE if setting == "1" else setting)
+
+
+def solve_or_load(store, key, solve, flux_ids=()):
+    """Return the stored Result for `key`, or call `solve()` and store its Result.
+
+    A stored result that lacks any of `flux_ids` is solved again.
+    """
+    if store is not None:
+        result = store.get(key)
+        if result is not None and all(rxn_id in result.fluxes for rxn_id in flux_ids):
+            return result
+    result = solve()
+    if store is not None:
+        store.put(key, result)
+    return result
+
+
+if __name__ == "__main__":
+    command, path = sys.argv[1], sys.argv[2]
+    store = open_store_from_env() or ResultStore()
+    if command == "accept":
+        print(f"Accepted {store.accept(model_hash(path))} scenario results")
+    elif command == "check":
+        absolute = float(sys.argv[3]) if len(sys.argv) > 3 else ABSOLUTE_TOLERANCE
+        relative = float(sys.argv[4]) if len(sys.argv) > 4 else RELATIVE_TOLERANCE
+        differences = store.regressions(model_hash(path), absolute, relative)
+        if len(differences):
+            print(differences.to_string(index=False))
+            sys.exit(1)
+        print("No regressions against the accepted snapshot")
+    else:
+        sys.exit(f"Unknown command: {command}")
@@ -0,0 +1,177 @@
+"""Flux sampling of iMD1629 with independent ACHR chains written to disk.
+
+The FVA warmup points are generated once and stored in the output
+directory; every chain then runs cobra's ACHR sampler from those points in
+its own worker process, with its own seed. Samples are written batch by
+batch into one memory-mapped .npy file per chain (rows are samples,
+columns reactions), so the samples never have to fit in memory.
+
+After every batch the chain state (current point, center, iteration
+count and random state) is saved next to its samples. Calling
+`sample_fluxes` again on the same directory continues each chain where it
+stopped, as long as model version, medium and settings are unchanged.
+Resuming restores cobra's ACHR sampler through its internals and numpy's
+global random state, so it also requires the cobra and numpy versions
+that started the run.
+
+    python sampling.py <output directory> [samples per chain] [chains] [thinning]
+"""
+import functools
+import json
+import os
+import sys
+
+import cobra
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+from cobra.sampling import ACHRSampler
+from cobra.sampling.hr_sampler import HRSampler
+
+from media import set_medium
+from model_cache import load_model, model_hash
+from parallel import default_processes, run_parallel
+from solvers import configure_solver
+from variability import constrain_to_optimum
+
+
+SAMPLING_MEDIUM = "minimal_glucose"
+THINNING = 100
+BATCH_SIZE = 100
+DTYPE = "float32"
+
+
+def _prepare_sampling(model, medium, fraction_of_optimum):
+    set_medium(model, medium)
+    if fraction_of_optimum is not None:
+        constrain_to_optimum(model, fraction_of_optimum)
+
+
+def _chain_files(directory, chain):
+    return os.path.join(directory, f"samples-{chain}.npy"), os.path.join(directory, f"chain-{chain}.npz")
+
+
+def _resume_sampler(model, warmup, thinning, seed, state_path):
+    """ACHR sampler on the stored warmup points, restored from `state_path` if it exists.
+
+    Returns (sampler, number of samples already written).
+    """
+    sampler = ACHRSampler.__new__(ACHRSampler)
+    # HRSampler only builds the problem; the FVA warmup of ACHRSampler.__init__ is loaded instead
+    HRSampler.__init__(sampler, model, thinning, seed=seed)
+    sampler.warmup = warmup
+    sampler.n_warmup = warmup.shape[0]
+    if os.path.exists(state_path):
+        state = np.load(state_path, allow_pickle=False)
+        sampler.prev = state["prev"]
+        sampler.center = state["center"]
+        sampler.n_samples = int(state["n_samples"])
+        np.random.set_state(("MT19937", state["rng_keys"], int(state["rng_pos"]),
+                             int(state["rng_has_gauss"]), float(state["rng_gauss"])))
+        return sampler, int(state["written"])
+    sampler.prev = sampler.center = warmup.mean(axis=0)
+    np.random.seed(sampler._seed)
+    return sampler, 0
+
+
+def _save_state(sampler, written, state_path):
+    _, keys, pos, has_gauss, gauss = np.random.get_state()
+    tmp_path = f"{state_path}.tmp.npz"
+    np.savez(tmp_path, prev=sampler.prev, center=sampler.center, n_samples=sampler.n_samples, written=written,
+             rng_keys=keys, rng_pos=pos, rng_has_gauss=has_gauss, rng_gauss=gauss)
+    os.replace(tmp_path, state_path)
+
+
+def _run_chain(model, task):
+    "Fill the sample file of one chain, resuming from its saved state. Returns the chain number."
+    directory, chain, n_samples, thinning, seed, batch_size = task
+    samples_path, state_path = _chain_files(directory, chain)
+    warmup = np.load(os.path.join(directory, "warmup.npy"))
+    sampler, written = _resume_sampler(model, warmup, thinning, seed, state_path)
+    samples = open_memmap(samples_path, mode="r+")
+    while written < n_samples:
+        batch = min(batch_size, n_samples - written)
+        points = sampler.sample(batch, fluxes=False).values
+        samples[written:written + batch] = points[:, sampler.fwd_idx] - points[:, sampler.rev_idx]
+        samples.flush()
+        written += batch
+        _save_state(sampler, written, state_path)
+    return chain
+
+
+def _settings(path_to_model, medium, fraction_of_optimum, thinning, n_samples, chains, seed, dtype):
+    return {"model_hash": model_hash(path_to_model), "medium": medium, "fraction_of_optimum": fraction_of_optimum,
+            "thinning": thinning, "n_samples": n_samples, "chains": chains, "seed": seed, "dtype": dtype,
+            "cobra_version": cobra.__version__, "numpy_version": np.__version__}
+
+
+def sample_fluxes(path_to_model, directory, n_samples, chains=None, medium=SAMPLING_MEDIUM, fraction_of_optimum=None,
+                  thinning=THINNING, seed=0, processes=None, batch_size=BATCH_SIZE, dtype=DTYPE):
+    """Draw `n_samples` flux samples per chain into `directory`.
+
+    With `fraction_of_optimum`, `Biomass_reaction_1` is held at that
+    fraction of its maximum while sampling. Chain i is seeded with
+    `seed + i`. An existing directory is resumed; it must have been
+    started with the same model version, settings and cobra and numpy
+    versions. Returns the
+    reaction ids (the columns of every sample file).
+    """
+    if chains is None:
+        chains = default_processes()
+    if processes is None:
+        processes = default_processes()
+    settings = _settings(path_to_model, medium, fraction_of_optimum, thinning, n_samples, chains, seed, dtype)
+    settings_path = os.path.join(directory, "settings.json")
+
+    if os.path.exists(settings_path):
+        with open(settings_path) as handle:
+            stored = json.load(handle)
+        differing = sorted(key for key in set(stored) | set(settings)
+                           if key != "reaction_ids" and stored.get(key) != settings.get(key))
+        if differing:
+            raise ValueError(f"{directory} holds samples with different "
+                             + ", ".join(f"{key} ({stored.get(key)} instead of {settings.get(key)})" for key in differing))
+        reaction_ids = stored["reaction_ids"]
+    else:
+        os.makedirs(directory, exist_ok=True)
+        model = load_model(path_to_model)
+        configure_solver(model, path_to_model)
+        _prepare_sampling(model, medium, fraction_of_optimum)
+        reaction_ids = [rxn.id for rxn in model.reactions]
+        np.save(os.path.join(directory, "warmup.npy"), ACHRSampler(model, thinning=thinning, seed=seed).warmup)
+        for chain in range(chains):
+            open_memmap(_chain_files(directory, chain)[0], mode="w+", dtype=dtype,
+                        shape=(n_samples, len(reaction_ids))).flush()
+        # written last: a directory without settings is not resumable
+        with open(settings_path, "w") as handle:
+            json.dump(dict(settings, reaction_ids=reaction_ids), handle, indent=1)
+
+    tasks = [(directory, chain, n_samples, thinning, seed + chain, batch_size) for chain in range(chains)]
+    prepare = functools.partial(_prepare_sampling, medium=medium, fraction_of_optimum=fraction_of_optimum)
+    run_parallel(path_to_model, _run_chain, tasks, processes=processes, prepare=prepare)
+    return reaction_ids
+
+
+def load_samples(directory):
+    "Read-only memory maps of the sample files of every chain, and the reaction ids."
+    with open(os.path.join(directory, "settings.json")) as handle:
+        settings = json.load(handle)
+    samples = [np.load(_chain_files(directory, chain)[0], mmap_mode="r") for chain in range(settings["chains"])]
+    return samples, settings["reaction_ids"]
+
+
+def sample_frame(directory, reactions, burn_in=0):
+    "DataFrame of the samples of `reactions` from all chains, skipping `burn_in` samples per chain."
+    samples, reaction_ids = load_samples(directory)
+    columns = [reaction_ids.index(rxn_id) for rxn_id in reactions]
+    return pd.concat([pd.DataFrame(np.asarray(chain[burn_in:, columns]), columns=list(reactions))
+                      for chain in samples], ignore_index=True)
+
+
+if __name__ == "__main__":
+    directory = sys.argv[1]
+    n_samples = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    chains = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    thinning = int(sys.argv[4]) if len(sys.argv) > 4 else THINNING
+    reaction_ids = sample_fluxes("../iMD1629.xml", directory, n_samples, chains=chains, thinning=thinning)
+    print(f"{n_samples} samples x {len(reaction_ids)} reactions per chain in {directory}")
@@ -0,0 +1,125 @@
+"""Network expansion over the stoichiometric matrix.
+
+Starting from a set of seed metabolites, a reaction fires once all of its
+reactants (in a direction its bounds allow) are in scope, and its products
+join the scope. This repeats until nothing new is reached (Handorf et al.,
+2005). If the scope of a medium plus one substrate does not contain every
+reactant of `Biomass_reaction_1`, the substrate cannot support growth and
+no LP is needed.
+
+Cofactors such as ATP or NAD are only regenerated by the network cycles
+that consume them, so pure expansion from the medium would miss almost
+everything. As is usual for scope analysis, the energy and redox carriers
+(H+, water, phosphate, ATP/ADP, NAD(P)(H), coenzyme A, CO2) are therefore
+seeded as well, but never a carbon backbone: with those the medium alone
+would already reach the biomass precursors. Phosphoenolpyruvate is only
+treated as a phosphoryl carrier where a reaction turns it into pyruvate,
+as the sugar phosphotransferase system does; otherwise glucose could not
+be taken up from scratch. Because this is a heuristic, the Biolog engine
+only uses the prefilter when asked to.
+"""
+import numpy as np
+from scipy import sparse
+
+from cobra.util.array import create_stoichiometric_matrix
+
+
+BIOMASS_REACTION = "Biomass_reaction_1"
+
+
+# carriers by BiGG id without compartment suffix, or by name
+CURRENCY_IDS = {"h", "h2o", "pi", "atp", "adp", "nad", "nadh", "nadp", "nadph", "coa", "co2"}
+CURRENCY_NAMES = {
+    "H+", "H2O", "Phosphate", "ATP", "ADP", "Nicotinamide adenine dinucleotide",
+    "Nicotinamide adenine dinucleotide - reduced", "Nicotinamide adenine dinucleotide phosphate",
+    "Nicotinamide adenine dinucleotide phosphate - reduced", "Coenzyme A", "CO2",
+}
+# (consumed, produced) carrier pairs, by BiGG id and by name
+CARRIER_PAIRS = [(("pep", "pyr"), ("Phosphoenolpyruvate", "Pyruvate"))]
+
+
+def _base_id(met):
+    return met.id.rsplit("_", 1)[0]
+
+
+def currency_metabolites(model):
+    "Ids of the energy and redox carriers of `model`, taken as freely available."
+    return [met.id for met in model.metabolites if _base_id(met) in CURRENCY_IDS or met.name in CURRENCY_NAMES]
+
+
+def carrier_pairs(model):
+    "[(consumed id, produced id)] of the carrier pairs in each compartment of `model`."
+    pairs = []
+    for (consumed_id, produced_id), (consumed_name, produced_name) in CARRIER_PAIRS:
+        for consumed in model.metabolites:
+            if _base_id(consumed) != consumed_id and consumed.name != consumed_name:
+                continue
+            for produced in model.metabolites:
+                if produced.compartment == consumed.compartment and (
+                        _base_id(produced) == produced_id or produced.name == produced_name):
+                    pairs.append((consumed.id, produced.id))
+    return pairs
+
+
+class NetworkScope:
+    """Scope calculator for the current bounds of `model`.
+
+    Reactions that are closed in both directions never fire, so build this
+    after applying the medium. Open uptake reactions (no reactants in the
+    allowed direction) fire from the start and seed their products. In a
+    reaction direction that consumes one metabolite of a carrier pair and
+    produces the other, the pair is ignored.
+    """
+
+    def __init__(self, model, currency=None, target_reaction=BIOMASS_REACTION):
+        stoichiometry = sparse.csc_matrix(create_stoichiometric_matrix(model, array_type="lil"))
+        bounds = np.array([rxn.bounds for rxn in model.reactions]).reshape(-1, 2)
+        forward = np.flatnonzero(bounds[:, 1] > 0)
+        reverse = np.flatnonzero(bounds[:, 0] < 0)
+        # one column per direction a reaction may run in
+        half_reactions = sparse.hstack([stoichiometry[:, forward], -stoichiometry[:, reverse]]).tocsc()
+        self.half_reaction_ids = [model.reactions[i].id for i in np.concatenate([forward, reverse])]
+
+        self.metabolite_index = {met.id: i for i, met in enumerate(model.metabolites)}
+        consumed = (half_reactions < 0).astype(np.int32).tolil()
+        produced = (half_reactions > 0).astype(np.int32).tolil()
+        for consumed_id, produced_id in carrier_pairs(model):
+            i, j = self.metabolite_index[consumed_id], self.metabolite_index[produced_id]
+            for k in np.flatnonzero(consumed[i].toarray().ravel() & produced[j].toarray().ravel()):
+                consumed[i, k] = 0
+                produced[j, k] = 0
+        self.consumed = consumed.tocsr()
+        self.produced = produced.tocsr()
+
+        if currency is None:
+            currency = currency_metabolites(model)
+        self.seeds = np.zeros(len(model.metabolites), dtype=bool)
+        self.seeds[self.indices(currency)] = True
+
+        target = model.reactions.get_by_id(target_reaction)
+        self.targets = self.indices(met.id for met, coefficient in target.metabolites.items() if coefficient < 0)
+
+    def indices(self, metabolite_ids):
+        return np.array([self.metabolite_index[met_id] for met_id in metabolite_ids], dtype=np.int64)
+
+    def expand(self, extra_seeds=()):
+        "Boolean array over metabolites that are in scope of the seeds plus `extra_seeds`."
+        in_scope = self.seeds.copy()
+        in_scope[self.indices(extra_seeds)] = True
+        while True:
+            missing_reactants = self.consumed.T @ (~in_scope).astype(np.int32)
+            fired = (missing_reactants == 0).astype(np.int32)
+            expanded = in_scope | (self.produced @ fired > 0)
+            if (expanded == in_scope).all():
+                return in_scope
+            in_scope = expanded
+
+    def reactions_in_scope(self, extra_seeds=()):
+        "Ids of the reactions that can fire (in some direction) from the seeds plus `extra_seeds`."
+        in_scope = self.expand(extra_seeds)
+        fired = self.consumed.T @ (~in_scope).astype(np.int32) == 0
+        return {self.half_reaction_ids[i] for i in np.flatnonzero(fired)}
+
+    def reaches_target(self, extra_seeds=()):
+        "True if every reactant of the target reaction is in scope."
+        return bool(self.expand(extra_seeds)[self.targets].all())
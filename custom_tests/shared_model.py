@@ -0,0 +1,170 @@
+"""iMD1629 as plain arrays in shared memory, for pools that do not need cobra objects.
+
+`export_arrays` reduces a model on its current medium to a CSR
+stoichiometric matrix, bound and objective vectors and id arrays.
+`SharedModel` copies these arrays once into `multiprocessing.shared_memory`;
+worker processes attach to the blocks by name, without copying or parsing
+anything, and solve their LPs from the arrays directly with HiGHS
+(`scipy.optimize.linprog`). A scenario is a set of bound changes.
+
+`screen_carbon_sources_shared` runs the Biolog plate this way and returns
+the same table as biolog.screen_carbon_sources.
+"""
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import linprog
+from cobra.util.array import create_stoichiometric_matrix
+
+from biolog import BIOMASS_REACTION, SINK_BOUNDS, plate_results, set_biolog_medium
+from model_cache import load_model
+from parallel import default_processes, split_evenly
+
+
+# linprog status codes as optlang status strings
+LINPROG_STATUS = {0: "optimal", 1: "iteration_limit", 2: "infeasible", 3: "unbounded", 4: "numeric"}
+SHARED_SOLVER = "highs_linprog"
+
+
+def export_arrays(model, sink_metabolites=(), objective=BIOMASS_REACTION):
+    """Arrays describing the LP of `model` under its current bounds.
+
+    A closed sink column (bounds 0, 0) named SK_<id> is appended for each
+    of `sink_metabolites` present in the model, so scenarios that open
+    sinks only change bounds.
+    """
+    stoichiometry = create_stoichiometric_matrix(model, array_type="lil").tocsc()
+    reaction_ids = [rxn.id for rxn in model.reactions]
+    metabolite_index = {met.id: i for i, met in enumerate(model.metabolites)}
+    sink_ids = [met_id for met_id in dict.fromkeys(sink_metabolites) if met_id in metabolite_index]
+    sinks = sparse.csc_matrix(
+        (-np.ones(len(sink_ids)), ([metabolite_index[met_id] for met_id in sink_ids], np.arange(len(sink_ids)))),
+        shape=(len(metabolite_index), len(sink_ids)),
+    )
+    stoichiometry = sparse.hstack([stoichiometry, sinks]).tocsr()
+    bounds = np.array([rxn.bounds for rxn in model.reactions], dtype=np.float64).reshape(-1, 2)
+    lower = np.concatenate([bounds[:, 0], np.zeros(len(sink_ids))])
+    upper = np.concatenate([bounds[:, 1], np.zeros(len(sink_ids))])
+    objective_vector = np.zeros(len(lower))
+    objective_vector[reaction_ids.index(objective)] = 1.0
+    return {
+        "data": stoichiometry.data.astype(np.float64),
+        "indices": stoichiometry.indices.astype(np.int32),
+        "indptr": stoichiometry.indptr.astype(np.int32),
+        "lower": lower,
+        "upper": upper,
+        "objective": objective_vector,
+        "reaction_ids": np.array(reaction_ids + [f"SK_{met_id}" for met_id in sink_ids]),
+        "metabolite_ids": np.array(list(metabolite_index)),
+    }
+
+
+class SharedModel:
+    """Arrays from `export_arrays`, each in its own shared memory block.
+
+    Pass `handle` to the workers and call `attach(handle)` there. Use as a
+    context manager (or call `close`) to free the blocks.
+    """
+
+    def __init__(self, arrays):
+        self.blocks = []
+        self.handle = {}
+        for name, array in arrays.items():
+            block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.handle[name] = (block.name, array.shape, array.dtype.str)
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(handle):
+    "({name: array view}, blocks) for a SharedModel handle; keep the blocks alive while using the arrays."
+    arrays, blocks = {}, []
+    for name, (block_name, shape, dtype) in handle.items():
+        # pool workers share the resource tracker of the creating process, which unlinks the blocks
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    return arrays, blocks
+
+
+class ArrayLP:
+    "Maximise the objective of exported arrays under scenario bound changes."
+
+    def __init__(self, arrays):
+        self.lower = arrays["lower"]
+        self.upper = arrays["upper"]
+        self.objective = arrays["objective"]
+        n_metabolites = len(arrays["indptr"]) - 1
+        # wraps the shared buffers, no copy
+        self.stoichiometry = sparse.csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]),
+                                               shape=(n_metabolites, len(self.lower)), copy=False)
+        self.zeros = np.zeros(n_metabolites)
+        self.column = {rxn_id: i for i, rxn_id in enumerate(arrays["reaction_ids"].tolist())}
+
+    def solve(self, bound_changes=None):
+        "(status, objective value) with {reaction id: (lower, upper)} applied on top of the exported bounds."
+        bounds = np.column_stack([self.lower, self.upper])
+        for rxn_id, rxn_bounds in (bound_changes or {}).items():
+            bounds[self.column[rxn_id]] = rxn_bounds
+        result = linprog(-self.objective, A_eq=self.stoichiometry, b_eq=self.zeros, bounds=bounds, method="highs")
+        status = LINPROG_STATUS.get(result.status, "failed")
+        return status, -result.fun if status == "optimal" else float("nan")
+
+
+_worker_lp = None
+_worker_blocks = None
+
+
+def _attach_worker(handle):
+    global _worker_lp, _worker_blocks
+    arrays, _worker_blocks = attach(handle)
+    _worker_lp = ArrayLP(arrays)
+
+
+def _screen_shared_chunk(metabolite_ids):
+    rows = []
+    for metabolite_id in metabolite_ids:
+        sink_id = f"SK_{metabolite_id}"
+        if sink_id not in _worker_lp.column:
+            rows.append(("missing_metabolite", float("nan"), 0.0))
+            continue
+        start = time.perf_counter()
+        status, objective_value = _worker_lp.solve({sink_id: SINK_BOUNDS})
+        rows.append((status, objective_value, time.perf_counter() - start))
+    return rows
+
+
+def screen_carbon_sources_shared(path_to_model, plate, processes=None):
+    """Biolog plate over a pool whose workers attach to one shared array export.
+
+    The model is loaded once, in this process, on the Biolog base medium.
+    Results have the layout of biolog.screen_carbon_sources.
+    """
+    if processes is None:
+        processes = default_processes()
+    model = load_model(path_to_model)
+    set_biolog_medium(model)
+    metabolite_ids = list(plate["metabolite_id"])
+    with SharedModel(export_arrays(model, metabolite_ids)) as shared:
+        del model
+        chunks = split_evenly(metabolite_ids, processes * 4)
+        with multiprocessing.Pool(max(1, min(processes, len(chunks))), initializer=_attach_worker,
+                                  initargs=(shared.handle,)) as pool:
+            rows = [row for chunk in pool.map(_screen_shared_chunk, chunks) for row in chunk]
+
+    return plate_results(plate, rows)
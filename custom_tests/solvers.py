@@ -0,0 +1,194 @@
+"""Solver selection for the test suites.
+
+The solver is chosen with the IMD_SOLVER environment variable, e.g.
+`IMD_SOLVER=auto python -m unittest`:
+
+* unset: keep cobra's default solver
+* a cobra solver name (glpk, gurobi, cplex, hybrid, ...): use that solver,
+  failing at startup if it is not installed
+* auto: time a representative set of iMD1629 LPs (biomass, precursor
+  demands, a Biolog sink) on every installed open-source LP solver and use
+  the fastest one among those that solve every LP to optimality with the
+  objective values of the reference solver (the first of
+  OPEN_SOURCE_LP_SOLVERS that solves them all)
+
+Calibration results are stored per machine and model version next to the
+model snapshots, so the timing runs once per machine and SBML file.
+"""
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import cobra
+from cobra.util.solver import solvers
+
+from media import set_medium
+from model_cache import CACHE_DIR, load_model, model_hash
+
+
+SOLVER_ENV = "IMD_SOLVER"
+OPEN_SOURCE_LP_SOLVERS = ("glpk", "hybrid", "scipy")
+# solver_calibration.json predates the check of the calibration results
+CALIBRATION_FILE = os.path.join(CACHE_DIR, "solver_calibration-v2.json")
+CALIBRATION_REPEATS = 3
+CALIBRATION_ABSOLUTE_TOLERANCE = 1e-6
+CALIBRATION_RELATIVE_TOLERANCE = 1e-6
+
+# (medium, objective reaction, metabolite given a demand or sink, boundary type)
+CALIBRATION_SCENARIOS = [
+    ("minimal_glucose", "Biomass_reaction_1", None, None),
+    ("minimal_glucose", "Protein_synthesis", "Protein_c", "demand"),
+    ("minimal_glucose", "DNA_synthesis", "DNA_c", "demand"),
+    ("minimal_glucose", "Phospholipids_synthesis", "Phospholipids_c", "demand"),
+    ("biolog_base", "Biomass_reaction_1", "956_e", "sink"),
+]
+
+
+def available_solvers():
+    "Names of the solvers cobra can use on this machine."
+    return sorted(solvers)
+
+
+def requested_solver():
+    "The solver requested through IMD_SOLVER, or None."
+    return os.environ.get(SOLVER_ENV) or None
+
+
+def solver_name(model):
+    "Name under which cobra knows the current solver interface of `model`."
+    return next(name for name, interface in solvers.items() if model.solver.interface is interface)
+
+
+def validate_solver(name):
+    "Raise ValueError unless `name` is 'auto' or an installed solver."
+    if name != "auto" and name not in solvers:
+        raise ValueError(
+            f"{SOLVER_ENV}={name} is not available; installed solvers: {', '.join(available_solvers())}"
+        )
+
+
+def time_scenarios(model, repeats=CALIBRATION_REPEATS):
+    """Total wall time and objective values of the calibration LPs on the current solver of `model`.
+
+    Returns (seconds, [objective value per scenario]); the value is NaN
+    when any repeat of a scenario does not end optimal.
+    """
+    total = 0.0
+    values = []
+    for medium, objective, metabolite_id, boundary_type in CALIBRATION_SCENARIOS:
+        if objective not in model.reactions:
+            continue
+        if metabolite_id is not None and metabolite_id not in model.metabolites:
+            continue
+        with model:
+            set_medium(model, medium)
+            model.objective = objective
+            if metabolite_id is not None:
+                model.add_boundary(model.metabolites.get_by_id(metabolite_id), type=boundary_type)
+            runs = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                objective_value = model.slim_optimize(error_value=float("nan"))
+                total += time.perf_counter() - start
+                runs.append(objective_value if model.solver.status == "optimal" else float("nan"))
+            values.append(float("nan") if any(math.isnan(value) for value in runs) else runs[-1])
+    return total, values
+
+
+def _calibration_key(path_to_model):
+    return "|".join([platform.node(), platform.machine(), model_hash(path_to_model), ",".join(available_solvers())])
+
+
+def _read_calibrations():
+    try:
+        with open(CALIBRATION_FILE) as handle:
+            return json.load(handle)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_calibration(key, calibration):
+    calibrations = _read_calibrations()
+    calibrations[key] = calibration
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w") as handle:
+        json.dump(calibrations, handle, indent=2)
+    os.replace(tmp_path, CALIBRATION_FILE)
+
+
+def calibrate(path_to_model, refresh=False):
+    """Time the calibration LPs on each installed open-source solver.
+
+    Solvers that fail a calibration LP or disagree with the reference
+    solver are left out. Returns {"solver": fastest, "timings": {solver:
+    seconds}, "reference": solver, "rejected": {solver: objective values}};
+    cached per machine, model version and set of installed solvers. Run
+    `python solvers.py` to recalibrate.
+    """
+    key = _calibration_key(path_to_model)
+    if not refresh:
+        cached = _read_calibrations().get(key)
+        if cached is not None:
+            return cached
+
+    model = load_model(path_to_model)
+    timings, values = {}, {}
+    for name in OPEN_SOURCE_LP_SOLVERS:
+        if name not in solvers:
+            continue
+        try:
+            model.solver = name
+            timings[name], values[name] = time_scenarios(model)
+        except Exception as error:
+            print(f"Skipping solver {name} in calibration: {error}")
+    reference = next((name for name in values if not any(math.isnan(value) for value in values[name])), None)
+    if reference is None:
+        raise RuntimeError("No open-source LP solver solved every calibration LP")
+    rejected = {}
+    for name in list(timings):
+        if not all(math.isclose(value, expected, rel_tol=CALIBRATION_RELATIVE_TOLERANCE,
+                                abs_tol=CALIBRATION_ABSOLUTE_TOLERANCE)
+                   for value, expected in zip(values[name], values[reference])):
+            print(f"Skipping solver {name} in calibration: its results differ from {reference}: {values[name]}")
+            rejected[name] = values[name]
+            del timings[name]
+    calibration = {"solver": min(timings, key=timings.get), "timings": timings, "reference": reference,
+                   "rejected": rejected}
+    _write_calibration(key, calibration)
+    return calibration
+
+
+def resolve_solver(path_to_model, name=None):
+    "Turn a requested solver (default: IMD_SOLVER) into a solver name, or None for cobra's default."
+    if name is None:
+        name = requested_solver()
+    if name is None:
+        return None
+    validate_solver(name)
+    if name == "auto":
+        return calibrate(path_to_model)["solver"]
+    return name
+
+
+def configure_solver(model, path_to_model, name=None):
+    """Switch `model` and cobra's default configuration to the requested solver.
+
+    Returns the solver name, or None if cobra's default was kept.
+    """
+    solver = resolve_solver(path_to_model, name)
+    if solver is not None:
+        cobra.Configuration().solver = solver
+        if model.solver.interface is not solvers[solver]:
+            model.solver = solver
+    return solver
+
+
+if __name__ == "__main__":
+    # python solvers.py [path to SBML] -- rerun the calibration and print it
+    path = sys.argv[1] if len(sys.argv) > 1 else "../iMD1629.xml"
+    print(json.dumps(calibrate(path, refresh=True), indent=2))
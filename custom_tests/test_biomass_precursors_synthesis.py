@@ -8,6 +8,18 @@ from cobra import Model, Reaction, Metabolite
 from cobra.flux_analysis.reaction import assess_component
 from cobra.util.array import create_stoichiometric_matrix
 
+from flags import refuse_flags
+from instrumentation import PROFILE_ENV, scenario
+from native_lp import NATIVE_ENV, NATIVE_SOLVER, BatchRunner, export_problem
+from media import medium_hash, set_medium
+from model_cache import load_model, model_hash
+from result_store import Result, ScenarioKey, open_store_from_env, solve_or_load
+from solvers import SOLVER_ENV, configure_solver, requested_solver, solver_name
+
+
+PRECURSOR_DEMANDS = ["Protein_c", "DNA_c", "RNA_c", "Carbohydrates_c", "generic_fatty_acid_c", "Neutral_lipids_c",
+                     "Phospholipids_c"]
+
 
 class TestBiomassPrecursorsSynthesisOnMinimalMediumWithGlucose(unittest.TestCase):
     def get_newest_model_version():
@@ -20,118 +32,106 @@ class TestBiomassPrecursorsSynthesisOnMinimalMediumWithGlucose(unittest.TestCase
     @classmethod
     def setUpClass(self):
         self.path_to_model = self.get_newest_model_version()
-        cobra_config = cobra.Configuration()
-        cobra_config = "gurobi"
-        self.model = read_sbml_model(self.path_to_model)
-        
-        # close all exchanges
-        for rxn in self.model.boundary:
-            rxn.lower_bound = 0
-            rxn.upper_bound = 0
-        
-        # open exchanges for minimal medium
-        upper_bound_to_open = ["DM_Biomass_c","DM_1059_m", "DM_148_c", "DM_1111_e"]
-        for rxn_id in upper_bound_to_open:
-            rxn = self.model.reactions.get_by_id(rxn_id)
-            rxn.upper_bound = 1000
-        
-        both_bounds_to_open = ["EX_956_e", "EX_1407_e","EX_1782_e","EX_1503_e","EX_1665_e","EX_1544_e","EX_118_e","EX_44_e","EX_1653_e"]
-        for rxn_id in both_bounds_to_open:
-            rxn = self.model.reactions.get_by_id(rxn_id)
-            rxn.lower_bound = -1000
-            rxn.upper_bound = 1000
+        self.model = load_model(self.path_to_model)
+        configure_solver(self.model, self.path_to_model)
+        print(f"Using solver: {self.model.solver.interface.__name__}")
         
+        set_medium(self.model, "minimal_glucose")
+        
+        # with IMD_RESULT_STORE set, scenarios already solved for this model and medium are not solved again
+        self.store = open_store_from_env()
+        self.model_hash = model_hash(self.path_to_model)
+
+        # with IMD_NATIVE_LP=1 the scenarios run on the exported base problem instead of the cobra model
+        self.runner = None
+        if os.environ.get(NATIVE_ENV, "0") == "1":
+            # the runner solves in GLPK, outside the instrumented scenarios
+            refuse_flags(f"{NATIVE_ENV}=1", [
+                (f"{SOLVER_ENV}={requested_solver()}", requested_solver()), (PROFILE_ENV, os.environ.get(PROFILE_ENV)),
+            ])
+            self.runner = BatchRunner(export_problem(self.path_to_model, "minimal_glucose",
+                                                     demand_metabolites=PRECURSOR_DEMANDS))
+
+    @classmethod
+    def tearDownClass(self):
+        if self.store is not None:
+            self.store.close()
+        if self.runner is not None:
+            self.runner.close()
+
+    def solve(self, objective, demand_metabolite, flux_ids):
+        "Objective value and `flux_ids` fluxes of `objective` with an optional demand reaction."
+        def run():
+            if self.runner is not None:
+                bounds = {f"DM_{demand_metabolite}": (0, 1000)} if demand_metabolite is not None else {}
+                return Result(*self.runner.solve(bounds, objective, flux_ids))
+            with scenario("precursors", objective) as record:
+                with self.model as model:
+                    model.objective = objective
+                    if demand_metabolite is not None:
+                        model.add_boundary(model.metabolites.get_by_id(demand_metabolite), type="demand")
+                    solution = record.optimize(model)
+            return Result(solution.status, solution.objective_value, solution.fluxes.loc[flux_ids].to_dict())
+
+        solver = NATIVE_SOLVER if self.runner is not None else solver_name(self.model)
+        key = ScenarioKey(self.model_hash, medium_hash("minimal_glucose"), objective,
+                          f"precursor:{demand_metabolite}", solver)
+        result = solve_or_load(self.store, key, run, flux_ids)
+        return result.objective_value, pandas.Series(result.fluxes).loc[flux_ids]
 
     def test_protein_synthesis(self):
-        model = self.model.copy()
-        model.objective = "Protein_synthesis"
-        model.add_boundary(model.metabolites.get_by_id("Protein_c"), type="demand")
-        solution = model.optimize()
-        self.assertTrue(solution.objective_value > 0.1)
-        
         # test exchanges - check if the mets are in fact inported
         # right now I test for exchanges that are used in the newest version of the model
-        ex_fluxes = solution.fluxes.loc[['EX_956_e', "EX_1503_e"]]
+        objective_value, ex_fluxes = self.solve("Protein_synthesis", "Protein_c", ['EX_956_e', "EX_1503_e"])
+        self.assertTrue(objective_value > 0.1)
         
         self.assertTrue( (ex_fluxes < -1).all() )
         
     def test_DNA_synthesis(self):
-        model = self.model.copy()
-        model.objective = "DNA_synthesis"
-        model.add_boundary(model.metabolites.get_by_id("DNA_c"), type="demand")
-        solution = model.optimize()
-        self.assertTrue(solution.objective_value > 0.1)
-        
         # test exchanges - check if the mets are in fact imported
         # right now I test for exchanges that are used in the newest version of the model
-        ex_fluxes = solution.fluxes.loc[['EX_956_e', "EX_1503_e"]]
+        objective_value, ex_fluxes = self.solve("DNA_synthesis", "DNA_c", ['EX_956_e', "EX_1503_e"])
+        self.assertTrue(objective_value > 0.1)
         
         self.assertTrue( (ex_fluxes < -1).all() )
         
     def test_RNA_synthesis(self):
-        model = self.model.copy()
-        model.objective = "RNA_synthesis"
-        model.add_boundary(model.metabolites.get_by_id("RNA_c"), type="demand")
-        solution = model.optimize()
-        self.assertTrue(solution.objective_value > 0.1)
-        
-        ex_fluxes = solution.fluxes.loc[['EX_956_e', "EX_1503_e"]]
+        objective_value, ex_fluxes = self.solve("RNA_synthesis", "RNA_c", ['EX_956_e', "EX_1503_e"])
+        self.assertTrue(objective_value > 0.1)
         
         
     def test_carbohydrates_synthesis(self):
-        model = self.model.copy()
-        model.objective = "Carbohydrates_synthesis"
-        model.add_boundary(model.metabolites.get_by_id("Carbohydrates_c"), type="demand")
-        solution = model.optimize()
-        self.assertTrue(solution.objective_value > 0.1)
-        
-        ex_fluxes = solution.fluxes.loc[['EX_956_e']]
+        objective_value, ex_fluxes = self.solve("Carbohydrates_synthesis", "Carbohydrates_c", ['EX_956_e'])
+        self.assertTrue(objective_value > 0.1)
         
         self.assertTrue( (ex_fluxes < -1).all() )
         
     def test_free_fatty_acids_synthesis(self):
-        model = self.model.copy()
-        model.objective = "free_fatty_acids_formation"
-        model.add_boundary(model.metabolites.get_by_id("generic_fatty_acid_c"), type="demand")
-        solution = model.optimize()
-        self.assertTrue(solution.objective_value > 0.1)
-        
-        ex_fluxes = solution.fluxes.loc[['EX_956_e']]
+        objective_value, ex_fluxes = self.solve("free_fatty_acids_formation", "generic_fatty_acid_c", ['EX_956_e'])
+        self.assertTrue(objective_value > 0.1)
         
         self.assertTrue( (ex_fluxes < -1).all() )
         
         
     def test_neutral_lipids_synthesis(self):
-        model = self.model.copy()
-        model.objective = "Neutral_lipids_synthesis"
-        model.add_boundary(model.metabolites.get_by_id("Neutral_lipids_c"), type="demand")
-        solution = model.optimize()
-        self.assertTrue(solution.objective_value > 0.1)
-        
-        ex_fluxes = solution.fluxes.loc[['EX_956_e']]
+        objective_value, ex_fluxes = self.solve("Neutral_lipids_synthesis", "Neutral_lipids_c", ['EX_956_e'])
+        self.assertTrue(objective_value > 0.1)
         
         self.assertTrue( (ex_fluxes < -1).all() )
         
     def test_phospholipids_synthesis(self):
-        model = self.model.copy()
-        model.objective = "Phospholipids_synthesis"
-        model.add_boundary(model.metabolites.get_by_id("Phospholipids_c"), type="demand")
-        solution = model.optimize()
-        self.assertTrue(solution.objective_value > 0.1)
-        
-        ex_fluxes = solution.fluxes.loc[['EX_956_e']]
+        objective_value, ex_fluxes = self.solve("Phospholipids_synthesis", "Phospholipids_c", ['EX_956_e'])
+        self.assertTrue(objective_value > 0.1)
         
         self.assertTrue( (ex_fluxes < -1).all() )
         
     def test_biomass_synthesis(self):
-        model = self.model.copy()
-        model.objective = "Biomass_reaction_1"
-        solution = model.optimize()
-        self.assertTrue(solution.objective_value > 0.04)
-        
         # test exchanges - check if the mets are in fact inported
         # right now I test for exchanges that are used in the newest version of the model
-        ex_fluxes = solution.fluxes.loc[["EX_1503_e", "EX_1544_e", "EX_1653_e", "EX_44_e", "EX_956_e"]]
+        objective_value, ex_fluxes = self.solve(
+            "Biomass_reaction_1", None, ["EX_1503_e", "EX_1544_e", "EX_1653_e", "EX_44_e", "EX_956_e"]
+        )
+        self.assertTrue(objective_value > 0.04)
         
         self.assertTrue( (ex_fluxes < -0.0001).all() )
 
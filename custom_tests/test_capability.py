@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from cobra.io import write_sbml_model
+
+from capability import ATLAS_MEDIUM, atlas_path, capability_atlas, carry_forward_atlas, producible_metabolites
+from media import medium_carbon_source, set_medium
+from model_cache import load_model
+
+
+class TestProducibleMetabolites(unittest.TestCase):
+
+    def get_newest_model_version():
+
+        path_to_model = "../iMD1629.xml"
+        print(f"Testing on model: {path_to_model}")
+
+        return path_to_model
+
+    @classmethod
+    def setUpClass(self):
+        self.path_to_model = self.get_newest_model_version()
+        self.model = load_model(self.path_to_model)
+        set_medium(self.model, ATLAS_MEDIUM)
+        self.uptake_reaction = medium_carbon_source(ATLAS_MEDIUM)
+        self.metabolite_ids = [met.id for met in self.model.metabolites if met.compartment == "c"]
+
+    def demand_values(self, uptake_reaction):
+        "Maximal flux of one add_boundary demand per metabolite."
+        values = []
+        for met_id in self.metabolite_ids:
+            with self.model as model:
+                if uptake_reaction is not None:
+                    uptake = model.reactions.get_by_id(uptake_reaction)
+                    uptake.lower_bound = max(uptake.lower_bound, -1)
+                demand = model.add_boundary(model.metabolites.get_by_id(met_id), type="demand")
+                model.objective = demand
+                values.append(model.slim_optimize(error_value=float("nan")))
+        return np.array(values)
+
+    def assert_matches_demands(self, uptake_reaction):
+        rows = producible_metabolites(self.model, self.metabolite_ids, uptake_reaction)
+        self.assertEqual([row[0] for row in rows], self.metabolite_ids)
+        values = np.array([row[2] for row in rows])
+        expected = self.demand_values(uptake_reaction)
+        self.assertTrue((expected > 1e-6).any())
+        self.assertTrue(np.allclose(values, expected, atol=1e-6, equal_nan=True))
+
+    def test_yields_match_demand_reactions(self):
+        self.assert_matches_demands(self.uptake_reaction)
+
+    def test_fluxes_match_demand_reactions(self):
+        self.assert_matches_demands(None)
+
+    def test_closed_uptake_is_refused(self):
+        with self.model as model:
+            model.reactions.get_by_id(self.uptake_reaction).lower_bound = 0
+            with self.assertRaises(ValueError):
+                producible_metabolites(model, self.metabolite_ids[:1], self.uptake_reaction)
+
+
+class TestCarryForwardAtlas(unittest.TestCase):
+
+    def get_newest_model_version():
+
+        path_to_model = "../iMD1629.xml"
+        print(f"Testing on model: {path_to_model}")
+
+        return path_to_model
+
+    @classmethod
+    def setUpClass(self):
+        self.path_to_model = self.get_newest_model_version()
+        self.directory = tempfile.TemporaryDirectory()
+        self.atlas = capability_atlas(self.path_to_model, processes=1, cache_dir=self.directory.name)
+
+    @classmethod
+    def tearDownClass(self):
+        self.directory.cleanup()
+
+    def edited_model(self, reaction_id, bounds):
+        "Path of a copy of the model with new bounds on one reaction."
+        model = load_model(self.path_to_model)
+        model.reactions.get_by_id(reaction_id).bounds = bounds
+        path = os.path.join(self.directory.name, f"{reaction_id}.xml")
+        write_sbml_model(model, path)
+        return path
+
+    def test_edit_to_blocked_reaction_carries_the_atlas(self):
+        path = self.edited_model("EX_118_e", (-999, 999))
+        self.assertEqual(carry_forward_atlas(self.path_to_model, path, cache_dir=self.directory.name), len(self.atlas))
+        computed = capability_atlas(path, processes=1, cache_dir=tempfile.mkdtemp(dir=self.directory.name))
+        carried = capability_atlas(path, processes=1, cache_dir=self.directory.name)
+        self.assertTrue(carried.index.equals(computed.index))
+        self.assertTrue((carried["status"] == computed["status"]).all())
+        self.assertTrue(np.allclose(carried["maximal_yield"], computed["maximal_yield"], atol=1e-6, equal_nan=True))
+
+    def test_edit_to_flux_carrying_reaction_is_not_carried(self):
+        lower_bound, upper_bound = load_model(self.path_to_model).reactions.ATPM.bounds
+        path = self.edited_model("ATPM", (lower_bound + 1, upper_bound))
+        self.assertEqual(carry_forward_atlas(self.path_to_model, path, cache_dir=self.directory.name), 0)
+        new_atlas = atlas_path(path, ATLAS_MEDIUM, medium_carbon_source(ATLAS_MEDIUM), self.directory.name)
+        self.assertFalse(os.path.exists(new_atlas))
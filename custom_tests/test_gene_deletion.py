@@ -0,0 +1,86 @@
+import random
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import gpr
+from deletion import (ESSENTIALITY_MEDIUM, double_gene_deletion_screen, single_gene_deletion_screen,
+                      synthetic_lethal_screen)
+from gpr import CompiledGPR
+from media import set_medium
+from model_cache import load_model
+
+
+class TestCompiledGPR(unittest.TestCase):
+
+    def get_newest_model_version():
+
+        path_to_model = "../iMD1629.xml"
+        print(f"Testing on model: {path_to_model}")
+
+        return path_to_model
+
+    @classmethod
+    def setUpClass(self):
+        self.path_to_model = self.get_newest_model_version()
+        self.model = load_model(self.path_to_model)
+        self.gene_ids = [gene.id for gene in self.model.genes]
+        pairs = [(a, b) for i, a in enumerate(self.gene_ids) for b in self.gene_ids[i + 1:]]
+        self.pairs = random.Random(0).sample(pairs, min(500, len(pairs)))
+
+    def assert_matches_cobra(self, compiled, deletion_sets):
+        disabled = compiled.disabled(deletion_sets)
+        for deletion_set, row in zip(deletion_sets, disabled):
+            expected = [rxn.gpr.body is not None and not rxn.gpr.eval(set(deletion_set)) for rxn in self.model.reactions]
+            self.assertTrue((row == np.array(expected)).all(), f"Deletion of {deletion_set}")
+
+    def test_single_gene_deletions(self):
+        self.assert_matches_cobra(CompiledGPR(self.model), [(gene_id,) for gene_id in self.gene_ids])
+
+    def test_gene_pair_deletions(self):
+        self.assert_matches_cobra(CompiledGPR(self.model), self.pairs)
+
+    def test_fallback_rules(self):
+        # rules with more than two DNF clauses are left to cobra's evaluator
+        with mock.patch.object(gpr, "MAX_CLAUSES", 2):
+            compiled = CompiledGPR(self.model)
+        self.assertTrue(len(compiled.fallback) > 0)
+        self.assert_matches_cobra(compiled, [(gene_id,) for gene_id in self.gene_ids] + self.pairs)
+
+
+class TestSyntheticLethalScreen(unittest.TestCase):
+
+    def get_newest_model_version():
+
+        path_to_model = "../iMD1629.xml"
+        print(f"Testing on model: {path_to_model}")
+
+        return path_to_model
+
+    @classmethod
+    def setUpClass(self):
+        self.path_to_model = self.get_newest_model_version()
+        model = load_model(self.path_to_model)
+        set_medium(model, ESSENTIALITY_MEDIUM)
+        singles = single_gene_deletion_screen(model)
+        viable = list(singles.index[~singles["essential"]])
+        # brute force: one LP per pair of non-essential genes
+        doubles = double_gene_deletion_screen(model, viable)
+        self.expected = {frozenset(label.split(";")) for label in doubles.index[doubles["essential"]]}
+
+    def lethal_pairs(self, results):
+        return {frozenset((a, b)) for a, b in zip(results["gene_a"], results["gene_b"])}
+
+    def test_matches_brute_force(self):
+        results = synthetic_lethal_screen(self.path_to_model, processes=1)
+        self.assertEqual(self.lethal_pairs(results), self.expected)
+
+    def test_matches_brute_force_with_fallback_rules(self):
+        with mock.patch.object(gpr, "MAX_CLAUSES", 2):
+            results = synthetic_lethal_screen(self.path_to_model, processes=1)
+        self.assertEqual(self.lethal_pairs(results), self.expected)
+
+    def test_feasibility_mode_matches_brute_force(self):
+        results = synthetic_lethal_screen(self.path_to_model, processes=1, feasibility=True)
+        self.assertEqual(self.lethal_pairs(results), self.expected)
@@ -0,0 +1,42 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from model_cache import cache_path, load_model
+
+
+class BrokenSnapshot:
+    "Unpickles by calling int('not a number'), which raises ValueError."
+
+    def __reduce__(self):
+        return int, ("not a number",)
+
+
+class TestModelCache(unittest.TestCase):
+
+    def get_newest_model_version():
+
+        path_to_model = "../iMD1629.xml"
+        print(f"Testing on model: {path_to_model}")
+
+        return path_to_model
+
+    @classmethod
+    def setUpClass(self):
+        self.path_to_model = self.get_newest_model_version()
+
+    def test_snapshot_names_the_library_versions(self):
+        name = os.path.basename(cache_path(self.path_to_model))
+        self.assertIn("-cobra", name)
+        self.assertIn("-optlang", name)
+
+    def test_unloadable_snapshot_is_a_cache_miss(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            snapshot = cache_path(self.path_to_model, cache_dir)
+            with open(snapshot, "wb") as handle:
+                pickle.dump(BrokenSnapshot(), handle)
+            model = load_model(self.path_to_model, cache_dir)
+            self.assertTrue(len(model.reactions) > 0)
+            # the broken snapshot was replaced by a good one
+            self.assertEqual(len(load_model(self.path_to_model, cache_dir).reactions), len(model.reactions))
@@ -0,0 +1,80 @@
+import functools
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from cobra.io import write_sbml_model
+
+import model_diff
+from biolog import read_plate, screen_carbon_sources, screen_carbon_sources_stored, set_biolog_medium
+from media import medium_hash
+from model_cache import load_model, model_hash
+from model_diff import blocked_in_relaxation, carry_forward
+from network_index import blocked_reactions
+from result_store import ResultStore
+
+
+PLATE = read_plate()
+
+
+class TestCarryForward(unittest.TestCase):
+
+    def get_newest_model_version():
+
+        path_to_model = "../iMD1629.xml"
+        print(f"Testing on model: {path_to_model}")
+
+        return path_to_model
+
+    @classmethod
+    def setUpClass(self):
+        self.path_to_model = self.get_newest_model_version()
+        self.model = load_model(self.path_to_model)
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ResultStore(os.path.join(self.directory.name, "results.sqlite"))
+        model = load_model(self.path_to_model)
+        set_biolog_medium(model)
+        screen_carbon_sources_stored(self.store, model_hash(self.path_to_model), medium_hash("biolog_base"), PLATE,
+                                     functools.partial(screen_carbon_sources, model), "glpk")
+        self.keys = [key for key, _ in self.store.results(model_hash(self.path_to_model))]
+
+    @classmethod
+    def tearDownClass(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def edited_model(self, reaction_id, bounds):
+        "Path of a copy of the model with new bounds on one reaction."
+        model = load_model(self.path_to_model)
+        model.reactions.get_by_id(reaction_id).bounds = bounds
+        path = os.path.join(self.directory.name, f"{reaction_id}.xml")
+        write_sbml_model(model, path)
+        return path
+
+    def test_store_holds_the_plate(self):
+        self.assertEqual(len(self.keys), len(PLATE))
+
+    def test_edit_to_blocked_reaction_reuses_every_result(self):
+        reaction_id = "EX_118_e"
+        self.assertIn(reaction_id, blocked_reactions(self.model))
+        path = self.edited_model(reaction_id, (-999, 999))
+        diff, affected, copied = carry_forward(self.store, self.path_to_model, path)
+        self.assertEqual(list(diff["changed_reactions"]), [reaction_id])
+        self.assertEqual(affected, [])
+        self.assertEqual(copied, len(self.keys))
+        self.assertEqual(len(self.store.results(model_hash(path))), len(self.keys))
+
+    def test_edit_to_flux_carrying_reaction_reruns_every_scenario(self):
+        reaction_id = "ATPM"
+        lower_bound, upper_bound = self.model.reactions.get_by_id(reaction_id).bounds
+        path = self.edited_model(reaction_id, (lower_bound + 1, upper_bound))
+        diff, affected, copied = carry_forward(self.store, self.path_to_model, path)
+        self.assertEqual(sorted(affected), sorted(self.keys))
+        self.assertEqual(copied, 0)
+        self.assertEqual(self.store.results(model_hash(path)), [])
+
+    def test_failed_relaxation_is_not_blocked(self):
+        # a NaN range comes from a failed solve and proves nothing
+        with mock.patch.object(model_diff, "flux_ranges", return_value=[("EX_118_e", 0.0, float("nan"))]):
+            self.assertEqual(blocked_in_relaxation(self.model, ["EX_118_e"], []), set())
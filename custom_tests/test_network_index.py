@@ -0,0 +1,60 @@
+import tempfile
+import unittest
+from unittest import mock
+
+from cobra.flux_analysis import find_blocked_reactions
+
+import network_index
+from biolog import read_plate
+from model_cache import load_model
+from network_index import blocked_reactions, blocked_sink_metabolites, load_network_index
+
+
+PLATE = read_plate()
+
+
+class TestNetworkIndex(unittest.TestCase):
+
+    def get_newest_model_version():
+
+        path_to_model = "../iMD1629.xml"
+        print(f"Testing on model: {path_to_model}")
+
+        return path_to_model
+
+    @classmethod
+    def setUpClass(self):
+        self.path_to_model = self.get_newest_model_version()
+        self.model = load_model(self.path_to_model)
+        self.metabolite_ids = [met_id for met_id in PLATE["metabolite_id"] if met_id in self.model.metabolites]
+
+    def test_blocked_reactions_match_cobra(self):
+        expected = find_blocked_reactions(self.model, open_exchanges=True)
+        self.assertTrue(len(expected) > 0)
+        self.assertEqual(sorted(blocked_reactions(self.model)), sorted(expected))
+
+    def test_blocked_sink_metabolites_match_cobra(self):
+        with self.model as model:
+            sinks = {met_id: model.add_boundary(model.metabolites.get_by_id(met_id), type="sink")
+                     for met_id in self.metabolite_ids}
+            for rxn in model.boundary:
+                rxn.bounds = (min(rxn.lower_bound, -1000), max(rxn.upper_bound, 1000))
+            blocked = set(find_blocked_reactions(model, list(sinks.values())))
+        expected = sorted(met_id for met_id, sink in sinks.items() if sink.id in blocked)
+        self.assertTrue(0 < len(expected) < len(self.metabolite_ids))
+        self.assertEqual(blocked_sink_metabolites(self.model, self.metabolite_ids), expected)
+
+    def test_cached_index_covers_new_sink_metabolites(self):
+        first, second = self.metabolite_ids[:10], self.metabolite_ids[10:]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            index = load_network_index(self.path_to_model, first, model=self.model, cache_dir=cache_dir)
+            self.assertEqual(index["sink_metabolites"], sorted(first))
+            # the cached index already covers a subset
+            with mock.patch.object(network_index, "blocked_sink_metabolites") as recompute:
+                load_network_index(self.path_to_model, first[:5], model=self.model, cache_dir=cache_dir)
+            recompute.assert_not_called()
+            index = load_network_index(self.path_to_model, second, model=self.model, cache_dir=cache_dir)
+            cached = load_network_index(self.path_to_model, self.metabolite_ids, cache_dir=cache_dir)
+        self.assertEqual(index["sink_metabolites"], sorted(self.metabolite_ids))
+        self.assertEqual(index["blocked_sink_metabolites"], blocked_sink_metabolites(self.model, self.metabolite_ids))
+        self.assertEqual(cached, index)
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from biolog import BIOMASS_REACTION, read_plate, set_biolog_medium
+from model_cache import load_model
+from phase_plane import OXYGEN_EXCHANGE, load_phase_planes, phase_planes
+
+
+UPTAKE_RATES = [0, 2.5, 10]
+OXYGEN_RATES = [0, 5, 20]
+
+
+class TestPhasePlanes(unittest.TestCase):
+
+    def get_newest_model_version():
+
+        path_to_model = "../iMD1629.xml"
+        print(f"Testing on model: {path_to_model}")
+
+        return path_to_model
+
+    @classmethod
+    def setUpClass(self):
+        self.path_to_model = self.get_newest_model_version()
+        self.model = load_model(self.path_to_model)
+        set_biolog_medium(self.model)
+        self.plate = read_plate().iloc[:8]
+        self.directory = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.directory.name, "phase_planes.npy")
+        self.values, self.substrates, self.uptake_rates, self.oxygen_rates = phase_planes(
+            self.path_to_model, self.output, self.plate, UPTAKE_RATES, OXYGEN_RATES, processes=2)
+
+    @classmethod
+    def tearDownClass(self):
+        del self.values
+        self.directory.cleanup()
+
+    def expected_value(self, metabolite_id, uptake_rate, oxygen_rate):
+        "Biomass flux with the substrate offered through add_boundary and oxygen limited."
+        with self.model as model:
+            model.objective = BIOMASS_REACTION
+            model.add_boundary(model.metabolites.get_by_id(metabolite_id), type="sink", lb=-uptake_rate)
+            model.reactions.get_by_id(OXYGEN_EXCHANGE).lower_bound = -oxygen_rate
+            value = model.slim_optimize(error_value=float("nan"))
+            return value if model.solver.status == "optimal" else float("nan")
+
+    def test_axes(self):
+        self.assertEqual(self.substrates, list(self.plate["metabolite_id"]))
+        self.assertEqual(self.uptake_rates, UPTAKE_RATES)
+        self.assertEqual(self.oxygen_rates, OXYGEN_RATES)
+        self.assertEqual(self.values.shape, (len(self.plate), len(UPTAKE_RATES), len(OXYGEN_RATES)))
+
+    def test_grid_matches_add_boundary(self):
+        expected = np.array([[[self.expected_value(metabolite_id, uptake_rate, oxygen_rate)
+                               for oxygen_rate in OXYGEN_RATES] for uptake_rate in UPTAKE_RATES]
+                             for metabolite_id in self.substrates])
+        self.assertTrue(np.nanmax(expected) > 0)
+        self.assertTrue(np.allclose(self.values, expected, atol=1e-5, equal_nan=True))
+
+    def test_reload(self):
+        values, substrates, _, _ = load_phase_planes(self.output)
+        self.assertEqual(substrates, self.substrates)
+        self.assertTrue(np.array_equal(values, self.values, equal_nan=True))
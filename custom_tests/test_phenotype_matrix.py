@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+from biolog import BIOMASS_REACTION, read_plate, screen_carbon_sources, set_biolog_medium
+from media import apply_medium, compile_medium, without_element
+from model_cache import load_model
+from phenotype_matrix import (BASE_MEDIUM, carbon_nitrogen_matrix, carbon_nitrogen_matrix_parallel,
+                              read_nitrogen_sources)
+
+
+CARBON_PLATE = read_plate().iloc[:10]
+NITROGEN_SOURCES = read_nitrogen_sources().iloc[:6]
+
+
+class TestCarbonNitrogenMatrix(unittest.TestCase):
+
+    def get_newest_model_version():
+
+        path_to_model = "../iMD1629.xml"
+        print(f"Testing on model: {path_to_model}")
+
+        return path_to_model
+
+    @classmethod
+    def setUpClass(self):
+        self.path_to_model = self.get_newest_model_version()
+        self.model = load_model(self.path_to_model)
+        set_biolog_medium(self.model)
+        self.matrix = carbon_nitrogen_matrix(self.model, CARBON_PLATE, NITROGEN_SOURCES)
+
+    def cell_value(self, carbon_id, nitrogen_source):
+        "Biomass flux on the nitrogen-free base with add_boundary sinks for the sources."
+        with self.model as model:
+            base = compile_medium(model, BASE_MEDIUM)
+            nitrogen_free, closed = without_element(model, base, "N")
+            apply_medium(model, nitrogen_free)
+            model.objective = BIOMASS_REACTION
+            exchanges = {next(iter(model.reactions.get_by_id(rxn_id).metabolites)).id: rxn_id for rxn_id in closed}
+            if nitrogen_source in exchanges:
+                model.reactions.get_by_id(exchanges[nitrogen_source]).lower_bound = -1000
+            else:
+                model.add_boundary(model.metabolites.get_by_id(nitrogen_source), type="sink")
+            if carbon_id != nitrogen_source:
+                model.add_boundary(model.metabolites.get_by_id(carbon_id), type="sink")
+            value = model.slim_optimize(error_value=float("nan"))
+            return value if model.solver.status == "optimal" else float("nan")
+
+    def test_base_nitrogen_column_matches_carbon_screen(self):
+        # the exchanges closed for the nitrogen-free base are open on the Biolog base medium
+        single = screen_carbon_sources(self.model, CARBON_PLATE)
+        self.assertEqual(self.matrix.columns[0], "nh4_e")
+        self.assertTrue(np.allclose(self.matrix["nh4_e"].values, single["objective_value"].values,
+                                    atol=1e-6, equal_nan=True))
+
+    def test_parallel_matches_serial(self):
+        parallel = carbon_nitrogen_matrix_parallel(self.path_to_model, CARBON_PLATE, NITROGEN_SOURCES, processes=2)
+        self.assertTrue(parallel.columns.equals(self.matrix.columns))
+        self.assertTrue(np.allclose(parallel.values, self.matrix.values, atol=1e-6, equal_nan=True))
+
+    def test_cells_match_two_sinks(self):
+        for row, column in [(0, 0), (0, 1), (2, 3), (4, 5), (9, 6)]:
+            carbon_id, nitrogen_source = self.matrix.index[row], self.matrix.columns[column]
+            self.assertTrue(np.isclose(self.matrix.iloc[row, column], self.cell_value(carbon_id, nitrogen_source),
+                                       atol=1e-6, equal_nan=True), f"{carbon_id} + {nitrogen_source}")
@@ -0,0 +1,47 @@
+import unittest
+
+from biolog import read_plate, screen_carbon_sources, set_biolog_medium
+from model_cache import load_model
+from scope import NetworkScope
+
+
+PLATE = read_plate()
+
+
+class TestBiologScopePrefilter(unittest.TestCase):
+
+    def get_newest_model_version():
+
+        path_to_model = "../iMD1629.xml"
+        print(f"Testing on model: {path_to_model}")
+
+        return path_to_model
+
+    @classmethod
+    def setUpClass(self):
+        self.path_to_model = self.get_newest_model_version()
+        self.model = load_model(self.path_to_model)
+        set_biolog_medium(self.model)
+        self.scope = NetworkScope(self.model)
+        self.reference = screen_carbon_sources(self.model, PLATE)
+        self.prefiltered = screen_carbon_sources(self.model, PLATE, prefilter=True)
+
+    def test_base_medium_alone_is_out_of_scope(self):
+        self.assertFalse(self.scope.reaches_target([]))
+
+    def test_no_growth_substrates_are_filtered(self):
+        for metabolite_id in ["968_c", "994_c"]:
+            self.assertEqual(self.prefiltered.loc[metabolite_id, "status"], "out_of_scope")
+
+    def test_glucose_is_in_scope(self):
+        self.assertTrue(self.scope.reaches_target(["956_e"]))
+
+    def test_no_growing_substrate_is_filtered(self):
+        growing = self.reference.index[self.reference["growth"] == 1]
+        self.assertTrue(len(growing) > 0)
+        filtered = [metabolite_id for metabolite_id in growing
+                    if self.prefiltered.loc[metabolite_id, "status"] == "out_of_scope"]
+        self.assertEqual(filtered, [])
+
+    def test_prefilter_keeps_growth_calls(self):
+        self.assertTrue((self.prefiltered["growth"] == self.reference["growth"]).all())
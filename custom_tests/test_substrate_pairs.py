@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from biolog import (BIOMASS_REACTION, classify_pairs, read_plate, screen_carbon_sources,
+                    screen_substrate_pairs, screen_substrate_pairs_parallel, set_biolog_medium)
+from model_cache import load_model
+
+
+PLATE = read_plate().iloc[:12]
+
+
+class TestSubstratePairs(unittest.TestCase):
+
+    def get_newest_model_version():
+
+        path_to_model = "../iMD1629.xml"
+        print(f"Testing on model: {path_to_model}")
+
+        return path_to_model
+
+    @classmethod
+    def setUpClass(self):
+        self.path_to_model = self.get_newest_model_version()
+        self.model = load_model(self.path_to_model)
+        set_biolog_medium(self.model)
+        self.pair_values = screen_substrate_pairs(self.model, PLATE)
+
+    def pair_value(self, first, second):
+        "Biomass flux with both substrates offered through add_boundary sinks."
+        with self.model as model:
+            model.objective = BIOMASS_REACTION
+            for metabolite_id in {first, second}:
+                model.add_boundary(model.metabolites.get_by_id(metabolite_id), type="sink")
+            value = model.slim_optimize(error_value=float("nan"))
+            return value if model.solver.status == "optimal" else float("nan")
+
+    def test_diagonal_matches_single_substrate_screen(self):
+        single = screen_carbon_sources(self.model, PLATE)
+        self.assertTrue(np.allclose(np.diag(self.pair_values.values), single["objective_value"].values,
+                                    atol=1e-6, equal_nan=True))
+
+    def test_matrix_is_symmetric(self):
+        self.assertTrue(np.array_equal(self.pair_values.values, self.pair_values.values.T, equal_nan=True))
+
+    def test_parallel_matches_serial(self):
+        parallel = screen_substrate_pairs_parallel(self.path_to_model, PLATE, processes=2)
+        self.assertTrue(parallel.index.equals(self.pair_values.index))
+        self.assertTrue(np.allclose(parallel.values, self.pair_values.values, atol=1e-6, equal_nan=True))
+
+    def test_cells_match_two_sinks(self):
+        metabolite_ids = list(PLATE["metabolite_id"])
+        for i, j in [(0, 2), (2, 6), (1, 11), (5, 8), (3, 3)]:
+            first, second = metabolite_ids[i], metabolite_ids[j]
+            self.assertTrue(np.isclose(self.pair_values.loc[first, second], self.pair_value(first, second),
+                                       atol=1e-6, equal_nan=True), f"{first} + {second}")
+
+    def test_pair_labels(self):
+        # a and b do not grow alone, c does
+        index = pd.Index(["a", "b", "c"], name="metabolite_id")
+        pair_values = pd.DataFrame([[0.0, 0.5, 1.0], [0.5, np.nan, 2.0], [1.0, 2.0, 1.0]], index=index,
+                                   columns=index.rename("second_metabolite_id"))
+        labels = classify_pairs(pair_values)
+        self.assertEqual(labels.loc["a", "b"], "rescue")
+        self.assertEqual(labels.loc["b", "c"], "enhance")
+        self.assertEqual(labels.loc["a", "c"], "none")
+        self.assertTrue((np.diag(labels.values) == "none").all())
+        self.assertTrue((labels.values == labels.values.T).all())
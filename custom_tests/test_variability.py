@@ -0,0 +1,59 @@
+import unittest
+
+import numpy as np
+from cobra.flux_analysis import flux_variability_analysis
+
+from biolog import BIOMASS_REACTION
+from media import set_medium
+from model_cache import load_model
+from variability import FVA_MEDIUM, flux_variability, parallel_flux_variability, select_reactions
+
+
+FRACTION_OF_OPTIMUM = 0.9
+
+
+class TestFluxVariability(unittest.TestCase):
+
+    def get_newest_model_version():
+
+        path_to_model = "../iMD1629.xml"
+        print(f"Testing on model: {path_to_model}")
+
+        return path_to_model
+
+    @classmethod
+    def setUpClass(self):
+        self.path_to_model = self.get_newest_model_version()
+        self.model = load_model(self.path_to_model)
+        set_medium(self.model, FVA_MEDIUM)
+        self.model.objective = BIOMASS_REACTION
+        self.expected = flux_variability_analysis(self.model, fraction_of_optimum=FRACTION_OF_OPTIMUM, processes=1)
+
+    def assert_matches_cobra(self, results):
+        expected = self.expected.loc[results.index]
+        self.assertTrue(np.allclose(results["minimum"], expected["minimum"], atol=1e-6))
+        self.assertTrue(np.allclose(results["maximum"], expected["maximum"], atol=1e-6))
+
+    def test_serial_matches_cobra(self):
+        results = flux_variability(self.model, fraction_of_optimum=FRACTION_OF_OPTIMUM)
+        self.assertEqual(sorted(results.index), sorted(self.expected.index))
+        self.assert_matches_cobra(results)
+
+    def test_parallel_matches_cobra(self):
+        results = parallel_flux_variability(self.path_to_model, fraction_of_optimum=FRACTION_OF_OPTIMUM, processes=2)
+        self.assertEqual(sorted(results.index), sorted(self.expected.index))
+        self.assert_matches_cobra(results)
+
+    def test_boundary_reactions_in_model_order(self):
+        boundary = [rxn.id for rxn in self.model.boundary]
+        self.assertEqual(select_reactions(self.model, "boundary"), boundary)
+        results = parallel_flux_variability(self.path_to_model, reactions="boundary",
+                                            fraction_of_optimum=FRACTION_OF_OPTIMUM, processes=2)
+        self.assertEqual(list(results.index), boundary)
+        self.assert_matches_cobra(results)
+
+    def test_boundary_reactions_come_first(self):
+        boundary = [rxn.id for rxn in self.model.boundary]
+        reaction_ids = select_reactions(self.model)
+        self.assertEqual(reaction_ids[:len(boundary)], boundary)
+        self.assertEqual(sorted(reaction_ids), sorted(rxn.id for rxn in self.model.reactions))
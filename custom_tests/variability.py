@@ -0,0 +1,138 @@
+"""Flux variability analysis of iMD1629 on the repository media.
+
+The exchange fluxes asserted in the precursor suite come from a single
+optimal solution; FVA gives the whole feasible range of each flux while
+`Biomass_reaction_1` is held at a fraction of its optimum.
+
+The minimum and maximum of a reaction are solved back to back, and each
+worker handles a contiguous run of reactions, so every LP is warm-started
+from the one before. Boundary reactions are ordered first so that the
+exchange ranges arrive early. Results can be streamed to a CSV file as the
+chunks complete.
+"""
+import csv
+import functools
+import sys
+import time
+
+import pandas as pd
+from optlang.symbolics import Zero
+from cobra.util.solver import fix_objective_as_constraint
+
+from biolog import BIOMASS_REACTION
+from media import set_medium
+from model_cache import load_model
+from parallel import default_processes, imap_parallel, split_evenly
+
+
+FVA_MEDIUM = "minimal_glucose"
+
+
+def select_reactions(model, reactions="all"):
+    """Reaction ids to analyse, boundary reactions first.
+
+    `reactions` is "all", "boundary", a subsystem name, or an explicit list
+    of reaction ids.
+    """
+    if reactions == "all":
+        selected = list(model.reactions)
+    elif reactions == "boundary":
+        selected = list(model.boundary)
+    elif isinstance(reactions, str):
+        selected = [rxn for rxn in model.reactions if rxn.subsystem == reactions]
+        if not selected:
+            raise ValueError(f"No reactions in subsystem: {reactions}")
+    else:
+        selected = [model.reactions.get_by_id(rxn_id) for rxn_id in reactions]
+    boundary = set(model.boundary)
+    return [rxn.id for rxn in selected if rxn in boundary] + [rxn.id for rxn in selected if rxn not in boundary]
+
+
+def constrain_to_optimum(model, fraction_of_optimum):
+    "Hold the biomass flux at `fraction_of_optimum` of its maximum and clear the objective."
+    model.objective = BIOMASS_REACTION
+    fix_objective_as_constraint(model, fraction=fraction_of_optimum)
+    model.objective = Zero
+
+
+def flux_ranges(model, reaction_ids):
+    """(reaction id, minimum, maximum) for each reaction under the current constraints.
+
+    The objective must be empty (see `constrain_to_optimum`); only the
+    coefficients of the reaction at hand are set and cleared again.
+    Bounds whose LP does not end optimal (e.g. an infeasible model) are NaN.
+    """
+    rows = []
+    objective = model.solver.objective
+    for rxn_id in reaction_ids:
+        rxn = model.reactions.get_by_id(rxn_id)
+        objective.set_linear_coefficients({rxn.forward_variable: 1, rxn.reverse_variable: -1})
+        values = []
+        for direction in ("min", "max"):
+            objective.direction = direction
+            value = model.slim_optimize(error_value=float("nan"))
+            values.append(value if model.solver.status == "optimal" else float("nan"))
+        objective.set_linear_coefficients({rxn.forward_variable: 0, rxn.reverse_variable: 0})
+        rows.append((rxn_id, values[0], values[1]))
+    return rows
+
+
+def flux_variability(model, reactions="all", fraction_of_optimum=1.0):
+    "Serial FVA on the current medium of `model`; the model is left unchanged."
+    with model:
+        reaction_ids = select_reactions(model, reactions)
+        constrain_to_optimum(model, fraction_of_optimum)
+        rows = flux_ranges(model, reaction_ids)
+    return pd.DataFrame(rows, columns=["reaction_id", "minimum", "maximum"]).set_index("reaction_id")
+
+
+def _prepare_fva(model, medium, fraction_of_optimum):
+    set_medium(model, medium)
+    constrain_to_optimum(model, fraction_of_optimum)
+
+
+def parallel_flux_variability(path_to_model, medium=FVA_MEDIUM, reactions="all", fraction_of_optimum=1.0,
+                              processes=None, output=None):
+    """FVA across the process pool.
+
+    Each worker loads the model once, applies `medium` and the biomass
+    constraint, and works through contiguous chunks of reactions. With
+    `output`, each chunk is appended to that CSV file as soon as it
+    completes. Returns a DataFrame indexed by reaction id in analysis order
+    (boundary reactions first); `attrs["wall_time"]` holds the elapsed time.
+    """
+    start = time.perf_counter()
+    reaction_ids = select_reactions(load_model(path_to_model), reactions)
+    if processes is None:
+        processes = default_processes()
+    chunks = split_evenly(reaction_ids, processes * 8)
+    prepare = functools.partial(_prepare_fva, medium=medium, fraction_of_optimum=fraction_of_optimum)
+
+    completed = {}
+    handle = open(output, "w", newline="") if output is not None else None
+    try:
+        if handle is not None:
+            writer = csv.writer(handle)
+            writer.writerow(["reaction_id", "minimum", "maximum"])
+        for index, rows in imap_parallel(path_to_model, flux_ranges, chunks, processes=processes, prepare=prepare):
+            completed[index] = rows
+            if handle is not None:
+                writer.writerows(rows)
+                handle.flush()
+    finally:
+        if handle is not None:
+            handle.close()
+
+    rows = [row for index in range(len(chunks)) for row in completed[index]]
+    results = pd.DataFrame(rows, columns=["reaction_id", "minimum", "maximum"]).set_index("reaction_id")
+    results.attrs["wall_time"] = time.perf_counter() - start
+    return results
+
+
+if __name__ == "__main__":
+    # python variability.py [output csv] [processes] [fraction of optimum]
+    output = sys.argv[1] if len(sys.argv) > 1 else f"fva_{FVA_MEDIUM}.csv"
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    fraction = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    results = parallel_flux_variability("../iMD1629.xml", fraction_of_optimum=fraction, processes=processes, output=output)
+    print(f"{len(results)} reactions in {results.attrs['wall_time']:.1f} s")